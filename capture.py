@@ -4,15 +4,16 @@ FILENAME: capture.py
 SYSTEM: FRANZ — Agentic Visual Loop for Windows 11 (Python 3.13, stdlib only)
 
 BIGGER PICTURE:
-    This file is the SCREENSHOT PRODUCER in the FRANZ pipeline. It is called
-    by execute.py (as a subprocess) after actions have been parsed and
-    validated. Its job is to produce a screenshot image that shows the current
+    This file is the SCREENSHOT PRODUCER in the FRANZ pipeline. execute.py
+    imports it and calls capture() after actions have been parsed and
+    validated (main() keeps the stdin/stdout JSON protocol for standalone
+    runs). Its job is to produce a screenshot image that shows the current
     state of the world — either the real Windows desktop, or a persistent
-    sandbox canvas — and return it as base64 PNG.
+    sandbox canvas — and return it as PNG bytes.
 
     The pipeline data flow:
-        main.py  ──stdin JSON──►  execute.py  ──stdin JSON──►  capture.py
-                 ◄─stdout JSON──             ◄──stdout JSON──
+        main.py  ──stdin JSON──►  execute.py  ──capture()──►  capture.py
+                 ◄─JSON line + PNG──         ◄──(png, applied_mask)──
 
     capture.py receives a list of CANONICAL action strings (already validated
     by execute.py). In sandbox mode, it renders the visual effect of each
@@ -22,9 +23,9 @@ BIGGER PICTURE:
     what was executed — marks are NEVER persisted to the sandbox canvas.
 
 SANDBOX TRANSPARENCY:
-    The sandbox canvas is a persistent BMP file (sandbox_canvas.bmp) that
-    accumulates white drawings across turns. A companion JSON file
-    (sandbox_state.json) tracks the last click position for type() actions.
+    The sandbox canvas is a persistent raw RGBA file (sandbox_canvas.rgba) that
+    accumulates white drawings across turns. A small companion file
+    (sandbox_state.bin) tracks the last click position for type() actions.
     From the pipeline's perspective, the sandbox is indistinguishable from a
     real desktop: actions produce visible changes, and the screenshot reflects
     the current state. The pipeline cannot tell the difference.
@@ -32,12 +33,12 @@ SANDBOX TRANSPARENCY:
     Important: not all actions can always be applied. For example, type()
     requires a prior click position. If the position is unknown, the action
     is silently skipped on the canvas. This file reports back which actions
-    were actually applied via the "applied" field in its JSON output, so
+    were actually applied via the "applied" mask it returns, so
     that execute.py can reconcile its executed/noted lists and give the VLM
     accurate feedback.
 
 MARKS vs SANDBOX DRAWINGS:
-    - Sandbox drawings (white): PERSISTENT — written to sandbox_canvas.bmp
+    - Sandbox drawings (white): PERSISTENT — written to sandbox_canvas.rgba
     - Red marks (numbered circles, arrows): EPHEMERAL — drawn on a copy,
       never saved. They help the VLM see what happened but don't accumulate.
 
@@ -46,23 +47,31 @@ SST GUARANTEE:
     action strings and image parameters. It cannot affect the SST data path.
 
 FILE PIPELINE:
-    INPUTS (stdin JSON from execute.py):
+    INPUTS (capture() arguments from execute.py, or stdin JSON via main()):
         actions: list[str]        — canonical executed action strings
         width, height: int        — output screenshot dimensions (0 = screen size)
         marks: bool               — draw red visual marks overlay
         sandbox: bool             — use persistent canvas instead of real capture
         sandbox_reset: bool       — wipe canvas and state before this turn
 
-    OUTPUTS (stdout JSON to execute.py):
-        screenshot_b64: str       — base64-encoded PNG of the current view
-        applied: list[str]        — actions that were actually rendered on canvas
-                                    (in real mode, equals the input actions list;
-                                     in sandbox mode, may be a subset if e.g.
-                                     type() was skipped due to no cursor position)
+    OUTPUTS (capture() return value, or stdout JSON via main()):
+        png: bytes                — PNG of the current view (main() emits it
+                                    base64-encoded as "screenshot_b64")
+        applied_mask: list[bool]  — per input action: actually rendered on canvas
+                                    (in real mode, all True; in sandbox mode,
+                                     False where e.g. type() was skipped due to
+                                     no cursor position). main() also emits the
+                                    matching "applied" list of action strings.
 
     SIDE EFFECTS (sandbox mode only):
-        sandbox_canvas.bmp        — persistent pixel data (atomic write)
-        sandbox_state.json        — persistent last_x/last_y (atomic write)
+        sandbox_canvas.rgba       — persistent pixel data, memory-mapped and
+                                    drawn on in place: the RGBA buffer
+                                    followed by a 16-byte trailer (b"FRZ2",
+                                    width, height, reserved; little-endian u32)
+        sandbox_state.bin         — persistent last_x/last_y (atomic write):
+                                    b"FRZS" + two little-endian i64, -1 = unset
+        sandbox_frame.bin         — last encoded frame (atomic write): b"FRZP" +
+                                    SHA-256 of the final pixels + PNG
 
 RUNTIME:
     - Windows 11, Python 3.13+
@@ -72,14 +81,22 @@ RUNTIME:
 from __future__ import annotations
 
 import ast
+import atexit
 import base64
 import ctypes
 import ctypes.wintypes
+import functools
+import hashlib
 import json
+import keyword
 import math
+import mmap
+import re
 import struct
 import sys
+import threading
 import zlib
+from collections.abc import Callable, Iterable
 from pathlib import Path
 from typing import Final
 
@@ -89,6 +106,9 @@ from typing import Final
 
 Color = tuple[int, int, int, int]
 Point = tuple[int, int]
+# (index in the input action list, name, pointer args in screen pixels,
+#  type() text)
+Action = tuple[int, str, tuple[int, ...], str | None]
 
 # ---------------------------------------------------------------------------
 # GDI constants
@@ -100,6 +120,15 @@ _BI_RGB: Final[int] = 0
 _DIB_RGB: Final[int] = 0
 _HALFTONE: Final[int] = 4
 
+# ---------------------------------------------------------------------------
+# PNG encoding
+# ---------------------------------------------------------------------------
+
+# Each screenshot is decoded once by the VLM and discarded, so deflate's
+# lazy matching (levels 4+) is wasted work. Level 1 is ~3x faster than the
+# old level 6 for roughly 15% more bytes on a desktop-like frame.
+_PNG_ZLEVEL: Final[int] = 1
+
 # ---------------------------------------------------------------------------
 # Visual mark colors (ephemeral overlay, never persisted)
 # ---------------------------------------------------------------------------
@@ -122,8 +151,27 @@ BLACK: Final[Color] = (0, 0, 0, 255)
 
 SANDBOX_DEFAULT: Final[bool] = False
 SANDBOX_RESET_DEFAULT: Final[bool] = False
-SANDBOX_CANVAS: Final[Path] = Path(__file__).with_name("sandbox_canvas.bmp")
-SANDBOX_STATE: Final[Path] = Path(__file__).with_name("sandbox_state.json")
+SANDBOX_CANVAS: Final[Path] = Path(__file__).with_name("sandbox_canvas.rgba")
+SANDBOX_CANVAS_LEGACY: Final[Path] = Path(__file__).with_name("sandbox_canvas.bmp")
+SANDBOX_STATE: Final[Path] = Path(__file__).with_name("sandbox_state.bin")
+SANDBOX_FRAME: Final[Path] = Path(__file__).with_name("sandbox_frame.bin")
+
+# The canvas is stored in its in-memory RGBA layout with a small trailer
+# after the pixels, so the pixel bytes start at offset 0 and the file can be
+# memory-mapped and drawn on directly with no pixel conversion.
+_CANVAS_MAGIC: Final[bytes] = b"FRZ2"
+_CANVAS_TRAILER: Final[struct.Struct] = struct.Struct("<4sIII")
+
+# Sandbox state is just the last click position: magic, last_x, last_y,
+# with -1 meaning "no position yet".
+_STATE_MAGIC: Final[bytes] = b"FRZS"
+_STATE_REC: Final[struct.Struct] = struct.Struct("<4sqq")
+
+# The last encoded sandbox frame: magic, SHA-256 of the final pixels (with
+# their size and layout), then its PNG. An unchanged frame reuses the PNG
+# instead of being deflated again.
+_FRAME_MAGIC: Final[bytes] = b"FRZP"
+_FRAME_HDR_SIZE: Final[int] = 4 + 32
 
 # ---------------------------------------------------------------------------
 # Win32 initialization
@@ -179,76 +227,94 @@ def _make_bmi(w: int, h: int) -> _BITMAPINFO:
 # ---------------------------------------------------------------------------
 
 
-def _capture_bgra(w: int, h: int) -> bytes:
-    sdc = _user32.GetDC(0)
-    memdc = _gdi32.CreateCompatibleDC(sdc)
-    bits = ctypes.c_void_p()
-    hbmp = _gdi32.CreateDIBSection(
-        sdc, ctypes.byref(_make_bmi(w, h)), _DIB_RGB, ctypes.byref(bits), None, 0
-    )
-    old = _gdi32.SelectObject(memdc, hbmp)
-    try:
-        _gdi32.BitBlt(memdc, 0, 0, w, h, sdc, 0, 0, _SRCCOPY | _CAPTUREBLT)
-        raw = bytes((ctypes.c_ubyte * (w * h * 4)).from_address(bits.value))
-    finally:
-        _gdi32.SelectObject(memdc, old)
-        _gdi32.DeleteObject(hbmp)
-        _gdi32.DeleteDC(memdc)
-        _user32.ReleaseDC(0, sdc)
-    return raw
-
-
-def _resize_bgra(src: bytes, sw: int, sh: int, dw: int, dh: int) -> bytes:
-    sdc = _user32.GetDC(0)
-    src_dc = _gdi32.CreateCompatibleDC(sdc)
-    dst_dc = _gdi32.CreateCompatibleDC(sdc)
-    src_bmp = _gdi32.CreateCompatibleBitmap(sdc, sw, sh)
-    old_src = _gdi32.SelectObject(src_dc, src_bmp)
-    dst_bits = ctypes.c_void_p()
-    dst_bmp = _gdi32.CreateDIBSection(
-        sdc, ctypes.byref(_make_bmi(dw, dh)), _DIB_RGB, ctypes.byref(dst_bits), None, 0
-    )
-    old_dst = _gdi32.SelectObject(dst_dc, dst_bmp)
-    try:
-        _gdi32.SetDIBits(sdc, src_bmp, 0, sh, src, ctypes.byref(_make_bmi(sw, sh)), _DIB_RGB)
-        _gdi32.SetStretchBltMode(dst_dc, _HALFTONE)
-        _gdi32.SetBrushOrgEx(dst_dc, 0, 0, None)
-        _gdi32.StretchBlt(dst_dc, 0, 0, dw, dh, src_dc, 0, 0, sw, sh, _SRCCOPY)
-        out = bytes((ctypes.c_ubyte * (dw * dh * 4)).from_address(dst_bits.value))
-    finally:
-        _gdi32.SelectObject(dst_dc, old_dst)
-        _gdi32.SelectObject(src_dc, old_src)
-        _gdi32.DeleteObject(dst_bmp)
-        _gdi32.DeleteObject(src_bmp)
-        _gdi32.DeleteDC(dst_dc)
-        _gdi32.DeleteDC(src_dc)
-        _user32.ReleaseDC(0, sdc)
-    return out
+class _CaptureContext:
+    """Screen DC plus a memory DC holding a w x h 32-bit DIB section."""
 
+    __slots__ = ("w", "h", "sdc", "memdc", "hbmp", "old", "bits")
 
-# ---------------------------------------------------------------------------
-# Pixel format conversion
-# ---------------------------------------------------------------------------
+    def __init__(self, w: int, h: int) -> None:
+        self.w = w
+        self.h = h
+        self.sdc = _user32.GetDC(0)
+        self.memdc = _gdi32.CreateCompatibleDC(self.sdc)
+        self.bits = ctypes.c_void_p()
+        self.hbmp = _gdi32.CreateDIBSection(
+            self.sdc, ctypes.byref(_make_bmi(w, h)), _DIB_RGB, ctypes.byref(self.bits), None, 0
+        )
+        self.old = _gdi32.SelectObject(self.memdc, self.hbmp)
 
+    def read(self) -> bytearray:
+        return bytearray((ctypes.c_ubyte * (self.w * self.h * 4)).from_address(self.bits.value))
+
+    def release(self) -> None:
+        _gdi32.SelectObject(self.memdc, self.old)
+        _gdi32.DeleteObject(self.hbmp)
+        _gdi32.DeleteDC(self.memdc)
+        _user32.ReleaseDC(0, self.sdc)
+
+
+# The DCs and DIB section are kept for the life of the process and only
+# rebuilt when the requested size changes; atexit hands them back to GDI.
+_ctx: _CaptureContext | None = None
+
+
+def _capture_ctx(w: int, h: int) -> _CaptureContext:
+    global _ctx
+    if _ctx is not None and _ctx.w == w and _ctx.h == h:
+        return _ctx
+    _release_capture_ctx()
+    _ctx = _CaptureContext(w, h)
+    return _ctx
 
-def _bgra_to_rgba(bgra: bytes) -> bytearray:
-    n = len(bgra)
-    out = bytearray(n)
-    out[0::4] = bgra[2::4]
-    out[1::4] = bgra[1::4]
-    out[2::4] = bgra[0::4]
-    out[3::4] = b"\xff" * (n // 4)
-    return out
 
+def _release_capture_ctx() -> None:
+    global _ctx
+    if _ctx is not None:
+        try:
+            _ctx.release()
+        except Exception:
+            pass
+        _ctx = None
+
+
+atexit.register(_release_capture_ctx)
+
+
+def _capture_bgra(w: int, h: int) -> bytearray:
+    ctx = _capture_ctx(w, h)
+    _gdi32.BitBlt(ctx.memdc, 0, 0, w, h, ctx.sdc, 0, 0, _SRCCOPY | _CAPTUREBLT)
+    return ctx.read()
+
+
+def _capture_bgra_scaled(dw: int, dh: int) -> bytearray:
+    """Capture the screen straight into a dw x dh DIB with one HALFTONE StretchBlt."""
+    ctx = _capture_ctx(dw, dh)
+    _gdi32.SetStretchBltMode(ctx.memdc, _HALFTONE)
+    _gdi32.SetBrushOrgEx(ctx.memdc, 0, 0, None)
+    _gdi32.StretchBlt(
+        ctx.memdc, 0, 0, dw, dh, ctx.sdc, 0, 0, _screen_w, _screen_h, _SRCCOPY | _CAPTUREBLT
+    )
+    return ctx.read()
 
-def _rgba_to_bgra(rgba: bytes) -> bytes:
-    n = len(rgba)
-    out = bytearray(n)
-    out[0::4] = rgba[2::4]
-    out[1::4] = rgba[1::4]
-    out[2::4] = rgba[0::4]
-    out[3::4] = b"\xff" * (n // 4)
-    return bytes(out)
+
+def _resize_32bpp(src: bytes | bytearray | mmap.mmap, sw: int, sh: int, dw: int, dh: int) -> bytearray:
+    """HALFTONE-resize a 32bpp frame; the output keeps the input's channel order.
+
+    HALFTONE filters every byte lane on its own, so an RGBA frame can be fed
+    through the BGRA DIB unchanged instead of being swapped there and back.
+    StretchDIBits reads the caller's buffer in place and scales it straight
+    into the persistent DIB section, with no intermediate source bitmap.
+    """
+    # ctypes only passes bytes as a pointer; a writable buffer (a GDI frame
+    # or the mapped sandbox canvas) is wrapped without a copy.
+    bits = src if isinstance(src, bytes) else (ctypes.c_ubyte * len(src)).from_buffer(src)
+    ctx = _capture_ctx(dw, dh)
+    _gdi32.SetStretchBltMode(ctx.memdc, _HALFTONE)
+    _gdi32.SetBrushOrgEx(ctx.memdc, 0, 0, None)
+    _gdi32.StretchDIBits(
+        ctx.memdc, 0, 0, dw, dh, 0, 0, sw, sh, bits, ctypes.byref(_make_bmi(sw, sh)), _DIB_RGB, _SRCCOPY
+    )
+    return ctx.read()
 
 
 # ---------------------------------------------------------------------------
@@ -256,20 +322,52 @@ def _rgba_to_bgra(rgba: bytes) -> bytes:
 # ---------------------------------------------------------------------------
 
 
-def _encode_png(rgba: bytes, w: int, h: int) -> bytes:
-    stride = w * 4
-    raw = bytearray()
-    for y in range(h):
-        raw.append(0)  # filter byte: None
-        raw.extend(rgba[y * stride : (y + 1) * stride])
-    ihdr = struct.pack(">IIBBBBB", w, h, 8, 6, 0, 0, 0)
-    idat = zlib.compress(bytes(raw), 6)
+def _encode_png(px: bytes, w: int, h: int, bgra: bool = False) -> bytearray:
+    """Encode 32-bit RGBA (or BGRA) pixels as a truecolor RGB PNG.
 
-    def _chunk(tag: bytes, body: bytes) -> bytes:
-        crc = zlib.crc32(tag + body) & 0xFFFFFFFF
-        return struct.pack(">I", len(body)) + tag + body + struct.pack(">I", crc)
-
-    return b"\x89PNG\r\n\x1a\n" + _chunk(b"IHDR", ihdr) + _chunk(b"IDAT", idat) + _chunk(b"IEND", b"")
+    Alpha is always opaque in this pipeline, so it is dropped. Packing the
+    3-byte rows is also where BGRA input gets its R/B swap, so callers never
+    need a separate conversion pass over the frame.
+    """
+    ri, bi = (2, 0) if bgra else (0, 2)
+    # Filtered stream: each scanline is filter byte 0 (None, already zero
+    # in the fresh buffer) followed by packed RGB. Packing row by row keeps
+    # source and destination cache-resident, which beats three full-frame
+    # strided passes plus a join by ~30% at 1080p.
+    src_stride = w * 4
+    stride = w * 3 + 1
+    raw = bytearray(h * stride)
+    for y in range(h):
+        o0 = y * stride + 1
+        o1 = o0 + stride - 1
+        s0 = y * src_stride
+        s1 = s0 + src_stride
+        raw[o0:o1:3] = px[s0 + ri : s1 : 4]
+        raw[o0 + 1 : o1 : 3] = px[s0 + 1 : s1 : 4]
+        raw[o0 + 2 : o1 : 3] = px[s0 + bi : s1 : 4]
+    z = zlib.compressobj(_PNG_ZLEVEL, zlib.DEFLATED, 15, 8, zlib.Z_DEFAULT_STRATEGY)
+    parts = (z.compress(raw), z.flush())
+    del raw
+    n = len(parts[0]) + len(parts[1])
+
+    # The whole file is laid out in one preallocated buffer: signature,
+    # IHDR (13-byte body), IDAT, IEND; each chunk is length, tag, body, CRC.
+    # The compressed parts are copied once, straight to their offset, and
+    # each CRC is taken over the tag + body bytes already in place.
+    out = bytearray(8 + 25 + 12 + n + 12)
+    mv = memoryview(out)
+    out[:8] = b"\x89PNG\r\n\x1a\n"
+    struct.pack_into(">I4sIIBBBBB", out, 8, 13, b"IHDR", w, h, 8, 2, 0, 0, 0)
+    struct.pack_into(">I", out, 29, zlib.crc32(mv[12:29]))
+    struct.pack_into(">I4s", out, 33, n, b"IDAT")
+    off = 41
+    for part in parts:
+        out[off : off + len(part)] = part
+        off += len(part)
+    struct.pack_into(">I", out, off, zlib.crc32(mv[37:off]))
+    struct.pack_into(">I4sI", out, off + 4, 0, b"IEND", zlib.crc32(b"IEND"))
+    mv.release()
+    return out
 
 
 # ---------------------------------------------------------------------------
@@ -277,114 +375,202 @@ def _encode_png(rgba: bytes, w: int, h: int) -> bytes:
 # ---------------------------------------------------------------------------
 
 
+@functools.lru_cache(maxsize=32)
+def _blend_luts(c: Color) -> tuple[bytes, bytes, bytes]:
+    """Per-channel 256-entry tables mapping a destination byte to its blend.
+
+    For a fixed source color and alpha the result of (s*sa + d*da)//255
+    depends only on d, so a whole span blends at C speed via bytes.translate.
+    """
+    sa = c[3]
+    da = 255 - sa
+    return (
+        bytes((c[0] * sa + d * da) // 255 for d in range(256)),
+        bytes((c[1] * sa + d * da) // 255 for d in range(256)),
+        bytes((c[2] * sa + d * da) // 255 for d in range(256)),
+    )
+
+
+def _stroke_spans(x1: int, y1: int, x2: int, y2: int, half: int) -> list[tuple[int, int, int]]:
+    """Rows covered by a Bresenham line stamped with a (2*half+1)² square.
+
+    Consecutive Bresenham steps move at most one pixel, so the union of the
+    stamps is a single contiguous span per row. Returns (y, x_lo, x_hi).
+    """
+    dx = abs(x2 - x1)
+    dy = abs(y2 - y1)
+    sx = 1 if x1 < x2 else -1
+    sy = 1 if y1 < y2 else -1
+    y_min = min(y1, y2)
+    n = dy + 1
+    if dx > dy:
+        # x-major: x advances on every step and after i steps the row offset
+        # is (2*i*dy + dx - 1) // (2*dx), so each row's run of steps starts
+        # at a ceiling division and the walk costs O(dy) instead of O(dx).
+        dx2, dy2 = dx << 1, dy << 1
+        starts = [0]
+        starts += [(dx2 * j - dx + dy2) // dy2 for j in range(1, n)]
+        ends = starts[1:]
+        ends.append(dx + 1)
+        if sx > 0:
+            lo = [x1 + i for i in starts]
+            hi = [x1 + i - 1 for i in ends]
+        else:
+            lo = [x1 - i + 1 for i in ends]
+            hi = [x1 - i for i in starts]
+        if sy < 0:
+            lo.reverse()
+            hi.reverse()
+    elif dy:
+        # y-major (or diagonal): y advances on every step, so each row holds
+        # exactly one pixel, at column offset (2*i*dx + dy - 1) // (2*dy).
+        dx2, dy2 = dx << 1, dy << 1
+        lo = [x1 + sx * ((dx2 * i + dy - 1) // dy2) for i in range(n)]
+        if sy < 0:
+            lo.reverse()
+        hi = lo
+    else:
+        lo = hi = [x1]
+    # x only ever moves towards x2, so both per-row extents are monotonic
+    # in y and a window's min/max sits at one of its ends. Padding each
+    # list with copies of its end value turns the clamped window lookups
+    # into plain positional ones, so zip() builds the spans without a
+    # per-row Python loop.
+    if half:
+        pad = half << 1
+        if (x2 >= x1) == (y2 >= y1):
+            lo = [lo[0]] * pad + lo
+            hi = hi + [hi[-1]] * pad
+        else:
+            lo = lo + [lo[-1]] * pad
+            hi = [hi[0]] * pad + hi
+        lo = [v - half for v in lo]
+        hi = [v + half for v in hi]
+    return list(zip(range(y_min - half, y_min + n + half), lo, hi))
+
+
+@functools.lru_cache(maxsize=32)
+def _disc_halfwidths(r: int) -> tuple[int, ...]:
+    """isqrt(r² - oy²) for oy in -r..r: the half-width of each disc row.
+
+    Marks reuse a handful of radii, so each is solved once per process.
+    """
+    r2 = r * r
+    return tuple(math.isqrt(r2 - oy * oy) for oy in range(-r, r + 1))
+
+
 class Canvas:
-    __slots__ = ("buf", "w", "h")
+    __slots__ = ("buf", "w", "h", "bgra")
 
-    def __init__(self, buf: bytearray, w: int, h: int) -> None:
+    def __init__(self, buf: bytearray | mmap.mmap, w: int, h: int, bgra: bool = False) -> None:
+        # Any fixed-size writable buffer whose slices support translate():
+        # a bytearray frame or the memory-mapped sandbox canvas. Nothing
+        # here mutates a slice copy, since an mmap slice is immutable bytes.
         self.buf = buf
         self.w = w
         self.h = h
-
-    def put(self, x: int, y: int, c: Color) -> None:
-        if x < 0 or y < 0 or x >= self.w or y >= self.h:
-            return
-        i = (y * self.w + x) << 2
-        sa = c[3]
-        if sa >= 255:
-            self.buf[i] = c[0]
-            self.buf[i + 1] = c[1]
-            self.buf[i + 2] = c[2]
-            self.buf[i + 3] = 255
+        # Colors are always given as RGBA; on a BGRA buffer (a raw GDI
+        # frame) they are swapped once per call instead of the frame being
+        # converted twice around the drawing.
+        self.bgra = bgra
+
+    def fill_spans(self, spans: Iterable[tuple[int, int, int]], c: Color, opaque: bool = False) -> None:
+        """Paint (y, x0, x1) inclusive row spans with c, clipped to the canvas.
+
+        Spans are written opaquely when 'opaque' is set or c has full alpha,
+        otherwise alpha-blended through the _blend_luts() tables. The color
+        work is resolved once per batch rather than once per span.
+        """
+        w, h, buf = self.w, self.h, self.buf
+        if self.bgra:
+            c = (c[2], c[1], c[0], c[3])
+        if opaque or c[3] >= 255:
+            pix = bytes((c[0], c[1], c[2], 255))
+            for y, x0, x1 in spans:
+                if 0 <= y < h:
+                    if x0 < 0:
+                        x0 = 0
+                    if x1 >= w:
+                        x1 = w - 1
+                    if x0 <= x1:
+                        i = (y * w + x0) << 2
+                        buf[i : i + ((x1 - x0 + 1) << 2)] = pix * (x1 - x0 + 1)
             return
-        da = 255 - sa
-        self.buf[i] = (c[0] * sa + self.buf[i] * da) // 255
-        self.buf[i + 1] = (c[1] * sa + self.buf[i + 1] * da) // 255
-        self.buf[i + 2] = (c[2] * sa + self.buf[i + 2] * da) // 255
-        self.buf[i + 3] = 255
-
-    def put_opaque(self, x: int, y: int, c: Color) -> None:
-        if x < 0 or y < 0 or x >= self.w or y >= self.h:
+        luts = _blend_luts(c)
+        lr, lg, lb = luts
+        if lr == lg or lg == lb or lr == lb:
+            # Two or three channels share a table: gray sources such as the
+            # white mark outline, and the pure-red marks whose G and B both
+            # blend towards 0. The whole span is blended with one contiguous
+            # translate; only the odd channel (if any) and alpha are patched
+            # with strided slices.
+            shared = lg if lg == lr or lg == lb else lr
+            odd = [(k, t) for k, t in enumerate(luts) if t != shared]
+            for y, x0, x1 in spans:
+                if 0 <= y < h:
+                    if x0 < 0:
+                        x0 = 0
+                    if x1 >= w:
+                        x1 = w - 1
+                    if x0 <= x1:
+                        i = (y * w + x0) << 2
+                        j = (y * w + x1 + 1) << 2
+                        src = buf[i:j]
+                        buf[i:j] = src.translate(shared)
+                        for k, t in odd:
+                            buf[i + k : j : 4] = src[k::4].translate(t)
+                        buf[i + 3 : j : 4] = b"\xff" * (x1 - x0 + 1)
             return
-        i = (y * self.w + x) << 2
-        self.buf[i] = c[0]
-        self.buf[i + 1] = c[1]
-        self.buf[i + 2] = c[2]
-        self.buf[i + 3] = 255
-
-    def put_thick_opaque(self, x: int, y: int, c: Color, t: int) -> None:
-        half = t >> 1
-        for dy in range(-half, half + 1):
-            for dx in range(-half, half + 1):
-                self.put_opaque(x + dx, y + dy, c)
-
-    def put_thick(self, x: int, y: int, c: Color, t: int) -> None:
-        half = t >> 1
-        for dy in range(-half, half + 1):
-            for dx in range(-half, half + 1):
-                self.put(x + dx, y + dy, c)
+        for y, x0, x1 in spans:
+            if 0 <= y < h:
+                if x0 < 0:
+                    x0 = 0
+                if x1 >= w:
+                    x1 = w - 1
+                if x0 <= x1:
+                    i = (y * w + x0) << 2
+                    j = (y * w + x1 + 1) << 2
+                    buf[i:j:4] = buf[i:j:4].translate(lr)
+                    buf[i + 1 : j : 4] = buf[i + 1 : j : 4].translate(lg)
+                    buf[i + 2 : j : 4] = buf[i + 2 : j : 4].translate(lb)
+                    buf[i + 3 : j : 4] = b"\xff" * (x1 - x0 + 1)
 
     def line(self, x1: int, y1: int, x2: int, y2: int, c: Color, t: int) -> None:
-        dx = abs(x2 - x1)
-        dy = abs(y2 - y1)
-        sx = 1 if x1 < x2 else -1
-        sy = 1 if y1 < y2 else -1
-        err = dx - dy
-        x, y = x1, y1
-        while True:
-            self.put_thick(x, y, c, t)
-            if x == x2 and y == y2:
-                break
-            e2 = err << 1
-            if e2 > -dy:
-                err -= dy
-                x += sx
-            if e2 < dx:
-                err += dx
-                y += sy
+        # Each covered pixel is blended exactly once, even where the square
+        # stamps of neighbouring steps overlap.
+        self.fill_spans(_stroke_spans(x1, y1, x2, y2, t >> 1), c)
 
     def line_opaque(self, x1: int, y1: int, x2: int, y2: int, c: Color, t: int) -> None:
-        dx = abs(x2 - x1)
-        dy = abs(y2 - y1)
-        sx = 1 if x1 < x2 else -1
-        sy = 1 if y1 < y2 else -1
-        err = dx - dy
-        x, y = x1, y1
-        while True:
-            self.put_thick_opaque(x, y, c, t)
-            if x == x2 and y == y2:
-                break
-            e2 = err << 1
-            if e2 > -dy:
-                err -= dy
-                x += sx
-            if e2 < dx:
-                err += dx
-                y += sy
+        self.fill_spans(_stroke_spans(x1, y1, x2, y2, t >> 1), c, True)
 
     def circle_opaque(self, cx: int, cy: int, r: int, c: Color) -> None:
-        r2 = r * r
-        for oy in range(-r, r + 1):
-            for ox in range(-r, r + 1):
-                if ox * ox + oy * oy <= r2:
-                    self.put_opaque(cx + ox, cy + oy, c)
+        hws = _disc_halfwidths(r)
+        spans: list[tuple[int, int, int]] = []
+        for oy in range(max(-r, -cy), min(r, self.h - 1 - cy) + 1):
+            hw = hws[oy + r]
+            spans.append((cy + oy, cx - hw, cx + hw))
+        self.fill_spans(spans, c, True)
 
     def rect_opaque(self, x: int, y: int, w: int, h: int, c: Color) -> None:
-        for yy in range(y, y + h):
-            for xx in range(x, x + w):
-                self.put_opaque(xx, yy, c)
+        self.fill_spans(((yy, x, x + w - 1) for yy in range(max(0, y), min(self.h, y + h))), c, True)
 
     def circle(self, cx: int, cy: int, r: int, c: Color, filled: bool, thickness: int) -> None:
-        r2o = r * r
+        # Row spans of {ox² + oy² <= r²}, minus {ox² + oy² < (r - thickness)²}
+        # for rings; each covered pixel is blended exactly once.
+        hws = _disc_halfwidths(r)
         r2i = max(0, (r - thickness)) ** 2
-        for oy in range(-r, r + 1):
-            for ox in range(-r, r + 1):
-                d2 = ox * ox + oy * oy
-                if filled:
-                    if d2 <= r2o:
-                        self.put(cx + ox, cy + oy, c)
-                else:
-                    if r2i <= d2 <= r2o:
-                        self.put(cx + ox, cy + oy, c)
+        spans: list[tuple[int, int, int]] = []
+        for oy in range(max(-r, -cy), min(r, self.h - 1 - cy) + 1):
+            hw = hws[oy + r]
+            y = cy + oy
+            gap = r2i - oy * oy
+            if filled or gap <= 0:
+                spans.append((y, cx - hw, cx + hw))
+            else:
+                hi = math.isqrt(gap - 1)
+                spans.append((y, cx - hw, cx - hi - 1))
+                spans.append((y, cx + hi + 1, cx + hw))
+        self.fill_spans(spans, c)
 
     def rect(self, x: int, y: int, w: int, h: int, c: Color, t: int) -> None:
         self.line(x, y, x + w, y, c, t)
@@ -398,21 +584,23 @@ class Canvas:
         ys = [p[1] for p in pts]
         lo = max(0, min(ys))
         hi = min(self.h - 1, max(ys))
-        n = len(pts)
+        # Edge list (xi, yi, xj, yj) built once; horizontal edges never
+        # produce a crossing, so they are dropped up front.
+        edges = [
+            (pts[i][0], pts[i][1], pts[i - 1][0], pts[i - 1][1])
+            for i in range(len(pts))
+            if pts[i][1] != pts[i - 1][1]
+        ]
+        spans: list[tuple[int, int, int]] = []
         for y in range(lo, hi + 1):
             nodes: list[int] = []
-            j = n - 1
-            for i in range(n):
-                yi, yj = pts[i][1], pts[j][1]
+            for xi, yi, xj, yj in edges:
                 if (yi < y <= yj) or (yj < y <= yi):
-                    nodes.append(int(pts[i][0] + (y - yi) / (yj - yi) * (pts[j][0] - pts[i][0])))
-                j = i
+                    nodes.append(int(xi + (y - yi) / (yj - yi) * (xj - xi)))
             nodes.sort()
             for k in range(0, len(nodes) - 1, 2):
-                x0 = max(0, nodes[k])
-                x1 = min(self.w - 1, nodes[k + 1])
-                for x in range(x0, x1 + 1):
-                    self.put(x, y, c)
+                spans.append((y, nodes[k], nodes[k + 1]))
+        self.fill_spans(spans, c)
 
     def arrow(self, x1: int, y1: int, x2: int, y2: int, c: Color, t: int) -> None:
         self.line(x1, y1, x2, y2, c, t)
@@ -477,8 +665,68 @@ _FONT_5X7: Final[dict[str, list[int]]] = {
     "/": [0b00001, 0b00010, 0b00100, 0b01000, 0b10000, 0b00000, 0b00000],
 }
 
-# Digit glyphs derived from the font (eliminates the old _DIGITS duplication)
-_DIGITS: Final[list[list[int]]] = [_FONT_5X7[str(d)] for d in range(10)]
+# Digit glyphs derived from the font (eliminates the old _DIGITS duplication);
+# tuples so they can key the glyph caches directly.
+_DIGITS: Final[tuple[tuple[int, ...], ...]] = tuple(tuple(_FONT_5X7[str(d)]) for d in range(10))
+
+
+def _row_runs(rows: list[int], dx: int, dy: int) -> tuple[tuple[int, int, int], ...]:
+    """Collapse per-row bitmasks (bit i = column i) into (y, x0, x1) runs."""
+    runs: list[tuple[int, int, int]] = []
+    for y, m in enumerate(rows):
+        while m:
+            lo = (m & -m).bit_length() - 1
+            t = m >> lo
+            n = (~t & (t + 1)).bit_length() - 1  # trailing ones = run length
+            runs.append((y + dy, lo + dx, lo + n - 1 + dx))
+            m &= ~(((1 << n) - 1) << lo)
+    return tuple(runs)
+
+
+@functools.lru_cache(maxsize=128)
+def _glyph_rows(pat: tuple[int, ...], scale: int) -> tuple[int, ...]:
+    """The glyph scaled up as one bitmask per pixel row."""
+    cell = (1 << scale) - 1
+    rows: list[int] = []
+    for bits in pat:
+        m = 0
+        for col in range(5):
+            if bits & (1 << (4 - col)):
+                m |= cell << (col * scale)
+        rows.extend([m] * scale)
+    return tuple(rows)
+
+
+@functools.lru_cache(maxsize=128)
+def _glyph_runs(pat: tuple[int, ...], scale: int) -> tuple[tuple[int, int, int], ...]:
+    return _row_runs(list(_glyph_rows(pat, scale)), 0, 0)
+
+
+@functools.lru_cache(maxsize=32)
+def _outline_rows(pat: tuple[int, ...], scale: int) -> tuple[int, ...]:
+    """Row bitmasks of the 8-neighbour (offset 2) halo the fill does not cover.
+
+    The dilation is done on row bitmasks shifted 2 px right/down so that
+    offsets of -2 stay non-negative: OR each row into its 3 target rows at
+    shifts 0, 2 and 4, then clear the glyph's own pixels.
+    """
+    fill = _glyph_rows(pat, scale)
+    halo = [0] * (len(fill) + 4)
+    for y, m in enumerate(fill):
+        spread = m | (m << 2) | (m << 4)
+        halo[y] |= spread
+        halo[y + 2] |= spread
+        halo[y + 4] |= spread
+    for y, m in enumerate(fill):
+        halo[y + 2] &= ~(m << 2)
+    return tuple(halo)
+
+
+@functools.lru_cache(maxsize=256)
+def _char_runs(ch: str, scale: int) -> tuple[tuple[int, int, int], ...] | None:
+    """Fill runs of one text character; None if the font has no glyph for it."""
+    pat = _FONT_5X7.get(ch.upper())
+    return None if pat is None else _glyph_runs(tuple(pat), scale)
 
 
 def _draw_text(cv: Canvas, x: int, y: int, text: str, c: Color, scale: int) -> None:
@@ -489,20 +737,13 @@ def _draw_text(cv: Canvas, x: int, y: int, text: str, c: Color, scale: int) -> N
             py += 8 * scale
             px = x
             continue
-        up = ch.upper()
-        pat = _FONT_5X7.get(up)
-        if pat is None:
+        runs = _char_runs(ch, scale)
+        if runs is None:
             # unknown char: draw a small filled box
             cv.rect_opaque(px, py, 5 * scale, 7 * scale, c)
             px += 6 * scale
             continue
-        for row in range(7):
-            bits = pat[row]
-            for col in range(5):
-                if bits & (1 << (4 - col)):
-                    for sy in range(scale):
-                        for sx in range(scale):
-                            cv.put_opaque(px + col * scale + sx, py + row * scale + sy, c)
+        cv.fill_spans(((py + dy, px + x0, px + x1) for dy, x0, x1 in runs), c, True)
         px += 6 * scale
 
 
@@ -511,44 +752,44 @@ def _draw_text(cv: Canvas, x: int, y: int, text: str, c: Color, scale: int) -> N
 # ---------------------------------------------------------------------------
 
 
-def _render_digit(cv: Canvas, cx: int, cy: int, d: int, fill: Color, outline: Color, scale: int) -> None:
-    gw = 5 * scale
-    gh = 7 * scale
-    ox = cx - gw // 2
-    oy = cy - gh // 2
-    g = _DIGITS[d]
-    # Outline pass (8-neighbor offset)
-    for ddy in (-1, 0, 1):
-        for ddx in (-1, 0, 1):
-            if ddx == 0 and ddy == 0:
-                continue
-            for ri, row in enumerate(g):
-                for ci in range(5):
-                    if row & (1 << (4 - ci)):
-                        for sy in range(scale):
-                            for sx in range(scale):
-                                cv.put_opaque(
-                                    ox + ci * scale + sx + ddx * 2,
-                                    oy + ri * scale + sy + ddy * 2,
-                                    outline,
-                                )
-    # Fill pass
-    for ri, row in enumerate(g):
-        for ci in range(5):
-            if row & (1 << (4 - ci)):
-                for sy in range(scale):
-                    for sx in range(scale):
-                        cv.put_opaque(ox + ci * scale + sx, oy + ri * scale + sy, fill)
-
+@functools.lru_cache(maxsize=64)
+def _number_runs(
+    n: int, scale: int
+) -> tuple[tuple[tuple[int, int, int], ...], tuple[tuple[int, int, int], ...]]:
+    """(outline, fill) runs of a whole mark number, relative to its center.
 
-def _render_number(cv: Canvas, cx: int, cy: int, n: int, fill: Color, outline: Color, scale: int) -> None:
+    Digits are composited in drawing order on shared row bitmasks (each
+    digit's halo, then its glyph, both opaque), so a later halo still wins
+    over an earlier glyph exactly as when the digits were drawn one by one.
+    The two masks end up disjoint, and marks reuse the same few numbers.
+    """
     s = str(n)
     gw = 5 * scale
+    gh = 7 * scale
     gap = 1 * scale
     tw = len(s) * gw + (len(s) - 1) * gap
-    start = cx - tw // 2 + gw // 2
+    ox = -(tw // 2)
+    oy = -(gh // 2)
+    halo = [0] * (gh + 4)
+    fill = [0] * (gh + 4)
     for i, ch in enumerate(s):
-        _render_digit(cv, start + i * (gw + gap), cy, int(ch), fill, outline, scale)
+        g = _DIGITS[int(ch)]
+        shift = i * (gw + gap)
+        for y, m in enumerate(_outline_rows(g, scale)):
+            m <<= shift
+            halo[y] |= m
+            fill[y] &= ~m
+        for y, m in enumerate(_glyph_rows(g, scale), 2):
+            m <<= shift + 2
+            fill[y] |= m
+            halo[y] &= ~m
+    return _row_runs(halo, ox - 2, oy - 2), _row_runs(fill, ox - 2, oy - 2)
+
+
+def _render_number(cv: Canvas, cx: int, cy: int, n: int, fill: Color, outline: Color, scale: int) -> None:
+    halo, body = _number_runs(n, scale)
+    cv.fill_spans(((cy + y, cx + x0, cx + x1) for y, x0, x1 in halo), outline, True)
+    cv.fill_spans(((cy + y, cx + x0, cx + x1) for y, x0, x1 in body), fill, True)
 
 
 # ---------------------------------------------------------------------------
@@ -556,10 +797,24 @@ def _render_number(cv: Canvas, cx: int, cy: int, n: int, fill: Color, outline: C
 # ---------------------------------------------------------------------------
 
 
+# Canonical actions from execute.py are almost always a plain name with
+# unsigned decimal int arguments; those skip the full Python compile. Any
+# other shape (strings, keywords, signs, comments, ...) takes the AST path.
+_INT_CALL_RE: Final[re.Pattern[str]] = re.compile(
+    r"([A-Za-z_][A-Za-z0-9_]*)[ \t]*\("
+    r"[ \t]*((?:0|[1-9][0-9]*)(?:[ \t]*,[ \t]*(?:0|[1-9][0-9]*))*)?[ \t]*"
+    r"\)"
+)
+
+
 def _parse_action(line: str) -> tuple[str, list[object], dict[str, object]] | None:
     s = line.strip()
     if not s:
         return None
+    m = _INT_CALL_RE.fullmatch(s)
+    if m is not None and not keyword.iskeyword(m[1]):
+        body = m[2]
+        return m[1], [int(v) for v in body.split(",")] if body else [], {}
     try:
         node = ast.parse(s, mode="eval").body
     except SyntaxError:
@@ -587,6 +842,45 @@ def _parse_action(line: str) -> tuple[str, list[object], dict[str, object]] | No
     return name, args, kwargs
 
 
+# Pointer arguments of the drawable actions, alternating x and y; each is
+# looked up by position first, then by keyword.
+_POINT_ARGS: Final[dict[str, tuple[str, ...]]] = {
+    "left_click": ("x", "y"),
+    "right_click": ("x", "y"),
+    "double_left_click": ("x", "y"),
+    "drag": ("x1", "y1", "x2", "y2"),
+}
+
+
+def _parse_actions(lines: list[str], w: int, h: int) -> list[Action]:
+    """Parse every action once for both the sandbox and the marks pass.
+
+    Unparseable lines are dropped and the "click" alias is folded into
+    "left_click" here. Pointer arguments are resolved and mapped to w x h
+    screen pixels once, so neither consumer repeats the lookup, int() and
+    _norm() per coordinate; an action missing one is dropped, since both
+    consumers would skip it anyway.
+    """
+    out: list[Action] = []
+    for idx, line in enumerate(lines):
+        parsed = _parse_action(line)
+        if parsed is None:
+            continue
+        name, args, kwargs = parsed
+        if name == "click":
+            name = "left_click"
+        pts: tuple[int, ...] = ()
+        keys = _POINT_ARGS.get(name)
+        if keys is not None:
+            vals = [_arg_int(args, kwargs, i, k) for i, k in enumerate(keys)]
+            if None in vals:
+                continue
+            pts = tuple(_norm(v, h if i & 1 else w) for i, v in enumerate(vals))  # type: ignore[arg-type]
+        text = _arg_str(args, kwargs, 0, "text") if name == "type" else None
+        out.append((idx, name, pts, text))
+    return out
+
+
 def _arg_int(args: list[object], kwargs: dict[str, object], idx: int, key: str) -> int | None:
     if idx < len(args):
         try:
@@ -616,27 +910,48 @@ def _arg_str(args: list[object], kwargs: dict[str, object], idx: int, key: str)
 
 
 def _norm(v: int, extent: int) -> int:
-    v = max(0, min(1000, v))
+    # Clamping with comparisons instead of max(min()) saves two builtin
+    # calls; the in-range mapping stays the float formula execute.py uses,
+    # so marks land exactly where the real click did.
+    if v <= 0:
+        return 0
+    if v >= 1000:
+        return extent
     return int((v / 1000.0) * extent)
 
 
 # ---------------------------------------------------------------------------
-# BMP file I/O (sandbox persistence)
+# Raw canvas file I/O (sandbox persistence)
 # ---------------------------------------------------------------------------
 
 
-def _bmp_write_black(path: Path, w: int, h: int) -> None:
-    stride = ((w * 3 + 3) // 4) * 4
-    size_image = stride * h
-    file_size = 54 + size_image
-    fh = struct.pack("<2sIHHI", b"BM", file_size, 0, 0, 54)
-    ih = struct.pack("<IiiHHIIiiII", 40, w, h, 1, 24, 0, size_image, 2835, 2835, 0, 0)
-    pad = b"\x00" * (stride - w * 3)
-    row = b"\x00" * (w * 3) + pad
-    data = fh + ih + row * h
+def _canvas_map(path: Path, w: int, h: int) -> mmap.mmap | None:
+    """Map the pixel bytes of a canvas file read/write; None on any mismatch.
+
+    Drawing through the mapping updates the file via the OS page cache, so
+    a turn never re-reads or re-writes the whole canvas itself.
+    """
+    n = w * h * 4
+    try:
+        with path.open("r+b") as f:
+            f.seek(n)
+            trailer = f.read()
+            if len(trailer) != _CANVAS_TRAILER.size:
+                return None
+            magic, cw, ch, _ = _CANVAS_TRAILER.unpack(trailer)
+            if magic != _CANVAS_MAGIC or cw != w or ch != h:
+                return None
+            return mmap.mmap(f.fileno(), n)
+    except Exception:
+        return None
+
+
+def _canvas_save(path: Path, buf: bytes, w: int, h: int) -> None:
     tmp = path.with_suffix(".tmp")
     try:
-        tmp.write_bytes(data)
+        with tmp.open("wb") as f:
+            f.write(buf)
+            f.write(_CANVAS_TRAILER.pack(_CANVAS_MAGIC, w, h, 0))
         tmp.replace(path)
     except Exception:
         try:
@@ -645,6 +960,7 @@ def _bmp_write_black(path: Path, w: int, h: int) -> None:
             pass
 
 
+# Canvases written by older versions were 24-bit BMPs; read once to migrate.
 def _bmp_load_rgba(path: Path, w: int, h: int) -> bytearray:
     try:
         data = path.read_bytes()
@@ -667,60 +983,21 @@ def _bmp_load_rgba(path: Path, w: int, h: int) -> bytearray:
         need = off + stride * h
         if len(data) < need:
             return bytearray()
+        # Gather the pixel bytes of each row (padding dropped) in top-down
+        # order, then reorder B,G,R[,X] -> R,G,B,255 with strided slices.
+        rb = w * bytespp
+        order = range(h) if bh < 0 else range(h - 1, -1, -1)
+        pix = b"".join([data[off + sy * stride : off + sy * stride + rb] for sy in order])
         out = bytearray(w * h * 4)
-        top_down = bh < 0
-        for y in range(h):
-            sy = y if top_down else (h - 1 - y)
-            row = data[off + sy * stride : off + (sy + 1) * stride]
-            di = y * w * 4
-            if bpp == 24:
-                for x in range(w):
-                    i = x * 3
-                    out[di + (x * 4)] = row[i + 2]
-                    out[di + (x * 4) + 1] = row[i + 1]
-                    out[di + (x * 4) + 2] = row[i]
-                    out[di + (x * 4) + 3] = 255
-            else:
-                for x in range(w):
-                    i = x * 4
-                    out[di + (x * 4)] = row[i + 2]
-                    out[di + (x * 4) + 1] = row[i + 1]
-                    out[di + (x * 4) + 2] = row[i]
-                    out[di + (x * 4) + 3] = 255
+        out[0::4] = pix[2::bytespp]
+        out[1::4] = pix[1::bytespp]
+        out[2::4] = pix[0::bytespp]
+        out[3::4] = b"\xff" * (w * h)
         return out
     except Exception:
         return bytearray()
 
 
-def _bmp_save_rgba(path: Path, buf: bytes, w: int, h: int) -> None:
-    stride = ((w * 3 + 3) // 4) * 4
-    size_image = stride * h
-    file_size = 54 + size_image
-    fh = struct.pack("<2sIHHI", b"BM", file_size, 0, 0, 54)
-    ih = struct.pack("<IiiHHIIiiII", 40, w, h, 1, 24, 0, size_image, 2835, 2835, 0, 0)
-    pad = b"\x00" * (stride - w * 3)
-    out = bytearray()
-    out.extend(fh)
-    out.extend(ih)
-    for y in range(h - 1, -1, -1):
-        row = buf[y * w * 4 : (y + 1) * w * 4]
-        for x in range(w):
-            i = x * 4
-            out.append(row[i + 2])
-            out.append(row[i + 1])
-            out.append(row[i])
-        out.extend(pad)
-    tmp = path.with_suffix(".tmp")
-    try:
-        tmp.write_bytes(bytes(out))
-        tmp.replace(path)
-    except Exception:
-        try:
-            tmp.unlink(missing_ok=True)
-        except Exception:
-            pass
-
-
 # ---------------------------------------------------------------------------
 # Sandbox state persistence
 # ---------------------------------------------------------------------------
@@ -730,10 +1007,8 @@ def _sandbox_state_load(reset: bool) -> dict[str, int | None]:
     if reset:
         return {"last_x": None, "last_y": None}
     try:
-        o = json.loads(SANDBOX_STATE.read_text(encoding="utf-8"))
-        lx = o.get("last_x")
-        ly = o.get("last_y")
-        if isinstance(lx, int) and isinstance(ly, int):
+        magic, lx, ly = _STATE_REC.unpack(SANDBOX_STATE.read_bytes())
+        if magic == _STATE_MAGIC and lx >= 0 and ly >= 0:
             return {"last_x": lx, "last_y": ly}
     except Exception:
         pass
@@ -741,9 +1016,12 @@ def _sandbox_state_load(reset: bool) -> dict[str, int | None]:
 
 
 def _sandbox_state_save(st: dict[str, int | None]) -> None:
+    lx, ly = st["last_x"], st["last_y"]
+    if lx is None or ly is None:
+        lx = ly = -1
     tmp = SANDBOX_STATE.with_suffix(".tmp")
     try:
-        tmp.write_text(json.dumps(st, indent=2), encoding="utf-8")
+        tmp.write_bytes(_STATE_REC.pack(_STATE_MAGIC, lx, ly))
         tmp.replace(SANDBOX_STATE)
     except Exception:
         try:
@@ -752,26 +1030,76 @@ def _sandbox_state_save(st: dict[str, int | None]) -> None:
             pass
 
 
+# ---------------------------------------------------------------------------
+# Sandbox frame cache
+# ---------------------------------------------------------------------------
+
+
+def _frame_digest(px: bytes | bytearray | mmap.mmap, w: int, h: int, bgra: bool) -> bytes:
+    d = hashlib.sha256(struct.pack("<II?", w, h, bgra))
+    d.update(px)
+    return d.digest()
+
+
+def _frame_cache_load(digest: bytes) -> bytes | None:
+    """The cached PNG if it was encoded from the same pixels."""
+    try:
+        with SANDBOX_FRAME.open("rb") as f:
+            if f.read(_FRAME_HDR_SIZE) != _FRAME_MAGIC + digest:
+                return None
+            return f.read() or None
+    except Exception:
+        return None
+
+
+def _frame_cache_save(digest: bytes, png: bytes | bytearray) -> None:
+    tmp = SANDBOX_FRAME.with_suffix(".tmp")
+    try:
+        with tmp.open("wb") as f:
+            f.write(_FRAME_MAGIC + digest)
+            f.write(png)
+        tmp.replace(SANDBOX_FRAME)
+    except Exception:
+        try:
+            tmp.unlink(missing_ok=True)
+        except Exception:
+            pass
+
+
 # ---------------------------------------------------------------------------
 # Sandbox canvas management
 # ---------------------------------------------------------------------------
 
 
-def _sandbox_load(w: int, h: int, reset: bool) -> bytearray:
+def _sandbox_load(w: int, h: int, reset: bool) -> bytearray | mmap.mmap:
+    """The sandbox canvas as a writable buffer, mapped from disk when possible."""
     if reset:
-        _bmp_write_black(SANDBOX_CANVAS, w, h)
         _sandbox_state_save({"last_x": None, "last_y": None})
-    if not SANDBOX_CANVAS.is_file():
-        _bmp_write_black(SANDBOX_CANVAS, w, h)
-    buf = _bmp_load_rgba(SANDBOX_CANVAS, w, h)
+    else:
+        mm = _canvas_map(SANDBOX_CANVAS, w, h)
+        if mm is not None:
+            return mm
+    buf = bytearray()
+    if not reset and SANDBOX_CANVAS_LEGACY.is_file():
+        buf = _bmp_load_rgba(SANDBOX_CANVAS_LEGACY, w, h)
     if not buf:
-        _bmp_write_black(SANDBOX_CANVAS, w, h)
-        return bytearray(b"\x00\x00\x00\xff" * (w * h))
-    return buf
+        buf = bytearray(b"\x00\x00\x00\xff" * (w * h))
+    _canvas_save(SANDBOX_CANVAS, buf, w, h)
+    # If the fresh file cannot be mapped the turn still works on 'buf';
+    # _sandbox_save() then falls back to a whole-file write.
+    mm = _canvas_map(SANDBOX_CANVAS, w, h)
+    return buf if mm is None else mm
 
 
-def _sandbox_save(buf: bytearray, w: int, h: int) -> None:
-    _bmp_save_rgba(SANDBOX_CANVAS, bytes(buf), w, h)
+def _sandbox_save(buf: bytearray | mmap.mmap, w: int, h: int) -> None:
+    if isinstance(buf, mmap.mmap):
+        # Only the pages the actions dirtied are written back.
+        try:
+            buf.flush()
+        except Exception:
+            pass
+    else:
+        _canvas_save(SANDBOX_CANVAS, buf, w, h)
 
 
 # ---------------------------------------------------------------------------
@@ -780,90 +1108,67 @@ def _sandbox_save(buf: bytearray, w: int, h: int) -> None:
 
 
 def _sandbox_apply(
-    buf: bytearray, w: int, h: int, actions: list[str], sandbox_reset: bool
-) -> tuple[bool, list[str]]:
+    buf: bytearray | mmap.mmap, w: int, h: int, actions: list[Action], sandbox_reset: bool
+) -> tuple[bool, list[int]]:
     """Apply actions to the sandbox canvas.
 
     Returns (dirty, applied) where:
         dirty: True if any pixels were changed
-        applied: list of action strings that were actually rendered
-                 (subset of input — e.g. type() is skipped if no cursor pos)
+        applied: input-list indices of the actions that were actually
+                 rendered (e.g. type() is skipped if no cursor pos)
     """
+    # Turns without a drawable action (none at all, or only screenshot()
+    # and the like) skip the state file read and the Canvas setup.
+    if not any(name in _POINT_ARGS or name == "type" for _, name, _, _ in actions):
+        return False, []
     cv = Canvas(buf, w, h)
     dirty = False
-    applied: list[str] = []
+    applied: list[int] = []
     st = _sandbox_state_load(sandbox_reset)
 
     def set_last(px: int, py: int) -> None:
         st["last_x"] = px
         st["last_y"] = py
 
-    for line in actions:
-        parsed = _parse_action(line)
-        if parsed is None:
-            continue
-        name, args, kwargs = parsed
-        if name == "click":
-            name = "left_click"
-
+    for idx, name, pts, text in actions:
         if name == "drag":
-            x1 = _arg_int(args, kwargs, 0, "x1")
-            y1 = _arg_int(args, kwargs, 1, "y1")
-            x2 = _arg_int(args, kwargs, 2, "x2")
-            y2 = _arg_int(args, kwargs, 3, "y2")
-            if None in (x1, y1, x2, y2):
-                continue
-            px1 = _norm(int(x1), w)
-            py1 = _norm(int(y1), h)
-            px2 = _norm(int(x2), w)
-            py2 = _norm(int(y2), h)
+            px1, py1, px2, py2 = pts
             cv.line_opaque(px1, py1, px2, py2, SANDBOX_WHITE, 4)
             set_last(px2, py2)
             dirty = True
-            applied.append(line)
+            applied.append(idx)
             continue
 
         if name == "left_click" or name == "double_left_click":
-            x = _arg_int(args, kwargs, 0, "x")
-            y = _arg_int(args, kwargs, 1, "y")
-            if x is None or y is None:
-                continue
-            px = _norm(int(x), w)
-            py = _norm(int(y), h)
+            px, py = pts
             cv.circle_opaque(px, py, 6, SANDBOX_WHITE)
             set_last(px, py)
             dirty = True
-            applied.append(line)
+            applied.append(idx)
             continue
 
         if name == "right_click":
-            x = _arg_int(args, kwargs, 0, "x")
-            y = _arg_int(args, kwargs, 1, "y")
-            if x is None or y is None:
-                continue
-            px = _norm(int(x), w)
-            py = _norm(int(y), h)
+            px, py = pts
             cv.rect_opaque(px - 6, py - 4, 12, 8, SANDBOX_WHITE)
             set_last(px, py)
             dirty = True
-            applied.append(line)
+            applied.append(idx)
             continue
 
         if name == "type":
-            t = _arg_str(args, kwargs, 0, "text")
-            if t is None:
+            if text is None:
                 continue
             lx = st.get("last_x")
             ly = st.get("last_y")
             if not isinstance(lx, int) or not isinstance(ly, int):
                 # No cursor position — cannot draw text, skip silently.
-                # This action will NOT appear in 'applied', so execute.py
+                # This action will NOT be marked applied, so execute.py
                 # will move it from executed to noted.
                 continue
             # Offset so text is readable next to the marker
-            _draw_text(cv, lx + 10, ly + 10, t, SANDBOX_WHITE, 2)
+            _draw_text(cv, lx + 10, ly + 10, text, SANDBOX_WHITE, 2)
             dirty = True
-            applied.append(line)
+            applied.append(idx)
             continue
 
     if dirty:
@@ -876,90 +1181,97 @@ def _sandbox_apply(
 # ---------------------------------------------------------------------------
 
 
-def _apply_marks(buf: bytearray, w: int, h: int, actions: list[str]) -> None:
-    cv = Canvas(buf, w, h)
-    px: int | None = None
-    py: int | None = None
-    n = 1
-    for line in actions:
-        parsed = _parse_action(line)
-        if parsed is None:
-            continue
-        name, args, kwargs = parsed
-        if name == "click":
-            name = "left_click"
+class _MarkState:
+    """Mark numbering and the last pointer position, carried across actions."""
+
+    __slots__ = ("cv", "px", "py", "n")
+
+    def __init__(self, cv: Canvas) -> None:
+        self.cv = cv
+        self.px: int | None = None
+        self.py: int | None = None
+        self.n = 1
+
+    def trail(self, x: int, y: int) -> None:
+        """Connect the previous pointer position to (x, y) unless they are close."""
+        px, py = self.px, self.py
+        if px is not None and py is not None and (abs(x - px) + abs(y - py) > 30):
+            self.cv.line(px, py, x, y, TRAIL_COLOR, 4)
+
+
+def _mark_click(st: _MarkState, x: int, y: int) -> None:
+    st.trail(x, y)
+    st.cv.circle(x, y, 32, MARK_OUTLINE, True, 3)
+    st.cv.circle(x, y, 28, MARK_FILL, True, 3)
+
+
+def _mark_left_click(st: _MarkState, pts: tuple[int, ...]) -> None:
+    x, y = pts
+    _mark_click(st, x, y)
+    _render_number(st.cv, x, y, st.n, MARK_TEXT, BLACK, 4)
+    st.px, st.py = x, y
+    st.n += 1
+
+
+def _mark_right_click(st: _MarkState, pts: tuple[int, ...]) -> None:
+    x, y = pts
+    _mark_click(st, x, y)
+    st.cv.rect(x + 20, y - 36, 16, 16, MARK_TEXT, 3)
+    _render_number(st.cv, x, y, st.n, MARK_TEXT, BLACK, 4)
+    st.px, st.py = x, y
+    st.n += 1
+
+
+def _mark_double_left_click(st: _MarkState, pts: tuple[int, ...]) -> None:
+    x, y = pts
+    _mark_click(st, x, y)
+    st.cv.circle(x, y, 42, MARK_OUTLINE, False, 3)
+    _render_number(st.cv, x, y, st.n, MARK_TEXT, BLACK, 4)
+    st.px, st.py = x, y
+    st.n += 1
+
+
+def _mark_drag(st: _MarkState, pts: tuple[int, ...]) -> None:
+    x1, y1, x2, y2 = pts
+    cv = st.cv
+    st.trail(x1, y1)
+    cv.circle(x1, y1, 20, MARK_OUTLINE, True, 3)
+    cv.circle(x1, y1, 16, MARK_FILL, True, 3)
+    _render_number(cv, x1, y1, st.n, MARK_TEXT, BLACK, 3)
+    cv.arrow(x1, y1, x2, y2, MARK_FILL, 6)
+    cv.circle(x2, y2, 20, MARK_OUTLINE, False, 4)
+    cv.circle(x2, y2, 16, MARK_FILL, False, 3)
+    st.px, st.py = x2, y2
+    st.n += 1
+
+
+def _mark_type(st: _MarkState, pts: tuple[int, ...]) -> None:
+    px, py = st.px, st.py
+    if px is None or py is None:
+        return
+    cv = st.cv
+    pad = 30
+    cv.rect(px - pad, py - pad // 2, pad * 2, pad, MARK_FILL, 4)
+    cv.rect(px - pad - 2, py - pad // 2 - 2, pad * 2 + 4, pad + 4, MARK_OUTLINE, 2)
+    _render_number(cv, px, py, st.n, MARK_TEXT, BLACK, 3)
+    st.n += 1
+
+
+_MARK_HANDLERS: Final[dict[str, Callable[[_MarkState, tuple[int, ...]], None]]] = {
+    "left_click": _mark_left_click,
+    "right_click": _mark_right_click,
+    "double_left_click": _mark_double_left_click,
+    "drag": _mark_drag,
+    "type": _mark_type,
+}
 
-        match name:
-            case "left_click":
-                x0 = _arg_int(args, kwargs, 0, "x")
-                y0 = _arg_int(args, kwargs, 1, "y")
-                if x0 is None or y0 is None:
-                    continue
-                x, y = _norm(int(x0), w), _norm(int(y0), h)
-                if px is not None and py is not None and (abs(x - px) + abs(y - py) > 30):
-                    cv.line(px, py, x, y, TRAIL_COLOR, 4)
-                cv.circle(x, y, 32, MARK_OUTLINE, True, 3)
-                cv.circle(x, y, 28, MARK_FILL, True, 3)
-                _render_number(cv, x, y, n, MARK_TEXT, BLACK, 4)
-                px, py = x, y
-                n += 1
-            case "right_click":
-                x0 = _arg_int(args, kwargs, 0, "x")
-                y0 = _arg_int(args, kwargs, 1, "y")
-                if x0 is None or y0 is None:
-                    continue
-                x, y = _norm(int(x0), w), _norm(int(y0), h)
-                if px is not None and py is not None and (abs(x - px) + abs(y - py) > 30):
-                    cv.line(px, py, x, y, TRAIL_COLOR, 4)
-                cv.circle(x, y, 32, MARK_OUTLINE, True, 3)
-                cv.circle(x, y, 28, MARK_FILL, True, 3)
-                cv.rect(x + 20, y - 36, 16, 16, MARK_TEXT, 3)
-                _render_number(cv, x, y, n, MARK_TEXT, BLACK, 4)
-                px, py = x, y
-                n += 1
-            case "double_left_click":
-                x0 = _arg_int(args, kwargs, 0, "x")
-                y0 = _arg_int(args, kwargs, 1, "y")
-                if x0 is None or y0 is None:
-                    continue
-                x, y = _norm(int(x0), w), _norm(int(y0), h)
-                if px is not None and py is not None and (abs(x - px) + abs(y - py) > 30):
-                    cv.line(px, py, x, y, TRAIL_COLOR, 4)
-                cv.circle(x, y, 32, MARK_OUTLINE, True, 3)
-                cv.circle(x, y, 28, MARK_FILL, True, 3)
-                cv.circle(x, y, 42, MARK_OUTLINE, False, 3)
-                _render_number(cv, x, y, n, MARK_TEXT, BLACK, 4)
-                px, py = x, y
-                n += 1
-            case "drag":
-                x10 = _arg_int(args, kwargs, 0, "x1")
-                y10 = _arg_int(args, kwargs, 1, "y1")
-                x20 = _arg_int(args, kwargs, 2, "x2")
-                y20 = _arg_int(args, kwargs, 3, "y2")
-                if None in (x10, y10, x20, y20):
-                    continue
-                x1, y1 = _norm(int(x10), w), _norm(int(y10), h)
-                x2, y2 = _norm(int(x20), w), _norm(int(y20), h)
-                if px is not None and py is not None and (abs(x1 - px) + abs(y1 - py) > 30):
-                    cv.line(px, py, x1, y1, TRAIL_COLOR, 4)
-                cv.circle(x1, y1, 20, MARK_OUTLINE, True, 3)
-                cv.circle(x1, y1, 16, MARK_FILL, True, 3)
-                _render_number(cv, x1, y1, n, MARK_TEXT, BLACK, 3)
-                cv.arrow(x1, y1, x2, y2, MARK_FILL, 6)
-                cv.circle(x2, y2, 20, MARK_OUTLINE, False, 4)
-                cv.circle(x2, y2, 16, MARK_FILL, False, 3)
-                px, py = x2, y2
-                n += 1
-            case "type":
-                if px is None or py is None:
-                    continue
-                pad = 30
-                cv.rect(px - pad, py - pad // 2, pad * 2, pad, MARK_FILL, 4)
-                cv.rect(px - pad - 2, py - pad // 2 - 2, pad * 2 + 4, pad + 4, MARK_OUTLINE, 2)
-                _render_number(cv, px, py, n, MARK_TEXT, BLACK, 3)
-                n += 1
-            case _:
-                continue
+
+def _apply_marks(buf: bytearray, w: int, h: int, actions: list[Action], bgra: bool = False) -> None:
+    st = _MarkState(Canvas(buf, w, h, bgra))
+    for _, name, pts, _ in actions:
+        handler = _MARK_HANDLERS.get(name)
+        if handler is not None:
+            handler(st, pts)
 
 
 # ---------------------------------------------------------------------------
@@ -974,47 +1286,81 @@ def capture(
     marks: bool,
     sandbox: bool,
     sandbox_reset: bool,
-) -> tuple[str, list[str]]:
-    """Produce a screenshot and return (base64_png, applied_actions).
-
-    In sandbox mode, 'applied_actions' is the subset of 'actions' that were
-    actually rendered on the canvas. In real mode, it equals 'actions'
-    (all actions are assumed applied since they were sent via SendInput).
+) -> tuple[bytes | bytearray, list[bool]]:
+    """Produce a screenshot and return (png, applied_mask).
+
+    'applied_mask' runs parallel to 'actions'. In sandbox mode it is True
+    only for the actions that were actually rendered on the canvas. In real
+    mode it is all True (all actions are assumed applied since they were
+    sent via SendInput). Being positional, it stays exact when the same
+    action string appears twice with different outcomes.
     """
     sw, sh = _screen_w, _screen_h
-    applied = list(actions)  # default: all applied (real mode)
+    applied = [True] * len(actions)  # default: all applied (real mode)
+    draw_marks = marks and bool(actions)
+    parsed = _parse_actions(actions, sw, sh) if sandbox or draw_marks else []
+    dw = sw if width <= 0 else width
+    dh = sh if height <= 0 else height
 
+    # 'px' is RGBA unless 'is_bgra' is set. GDI produces BGRA, and both the
+    # Canvas (which swaps its colors instead) and the PNG encoder accept
+    # either layout, so a real-mode frame is never channel-swapped. 'size'
+    # is the current dimensions of 'px'.
+    is_bgra = False
+    size = (sw, sh)
+    saver: threading.Thread | None = None
     if sandbox:
         base = _sandbox_load(sw, sh, sandbox_reset)
-        dirty, applied = _sandbox_apply(base, sw, sh, actions, sandbox_reset)
+        dirty, drawn = _sandbox_apply(base, sw, sh, parsed, sandbox_reset)
+        applied = [False] * len(actions)
+        for i in drawn:
+            applied[i] = True
         if dirty:
-            _sandbox_save(base, sw, sh)
-        rgba = bytearray(base)  # COPY — marks go on the copy, not on base
+            # Nothing below writes to base, so the save runs alongside the
+            # marks, resize and PNG encode instead of in front of them.
+            saver = threading.Thread(target=_sandbox_save, args=(base, sw, sh))
+            saver.start()
+        # Marks go on a COPY, never on base; without marks nothing writes to
+        # the frame after this point, so base itself is encoded as-is.
+        px = bytearray(base) if draw_marks else base
+    elif draw_marks or (dw, dh) == (sw, sh):
+        px = _capture_bgra(sw, sh)
+        is_bgra = True
     else:
-        rgba = _bgra_to_rgba(_capture_bgra(sw, sh))
+        # Nothing to draw at screen resolution: GDI scales straight from
+        # the screen DC instead of a readback + upload + stretch round trip.
+        px = _capture_bgra_scaled(dw, dh)
+        is_bgra = True
+        size = (dw, dh)
 
-    if marks and actions:
-        _apply_marks(rgba, sw, sh, actions)
+    if draw_marks:
+        _apply_marks(px, sw, sh, parsed, is_bgra)
 
-    dw = sw if width <= 0 else width
-    dh = sh if height <= 0 else height
-    if (dw, dh) != (sw, sh):
-        bgra = _rgba_to_bgra(bytes(rgba))
-        bgra2 = _resize_bgra(bgra, sw, sh, dw, dh)
-        rgba = _bgra_to_rgba(bgra2)
+    if (dw, dh) != size:
+        px = _resize_32bpp(px, sw, sh, dw, dh)
 
-    png = _encode_png(bytes(rgba), dw, dh)
-    b64 = base64.b64encode(png).decode("ascii")
-    return b64, applied
+    if sandbox:
+        # Idle sandbox turns produce the same frame over and over; hashing
+        # the final pixels is far cheaper than deflating them again.
+        digest = _frame_digest(px, dw, dh, is_bgra)
+        png = _frame_cache_load(digest)
+        if png is None:
+            png = _encode_png(px, dw, dh, is_bgra)
+            _frame_cache_save(digest, png)
+    else:
+        png = _encode_png(px, dw, dh, is_bgra)
+    if saver is not None:
+        saver.join()
+    return png, applied
 
 
 # ---------------------------------------------------------------------------
-# Subprocess entry point
+# Standalone entry point (stdin/stdout JSON)
 # ---------------------------------------------------------------------------
 
 
 def main() -> None:
-    req = json.loads(sys.stdin.read() or "{}")
+    req = json.loads(sys.stdin.buffer.read() or b"{}")
     actions = req.get("actions", [])
     if not isinstance(actions, list):
         actions = []
@@ -1025,12 +1371,19 @@ def main() -> None:
     sandbox = bool(req.get("sandbox", SANDBOX_DEFAULT))
     sandbox_reset = bool(req.get("sandbox_reset", SANDBOX_RESET_DEFAULT))
 
-    b64, applied = capture(actions, width, height, marks, sandbox, sandbox_reset)
-
-    # Output JSON (protocol change: was raw base64, now structured JSON
-    # so execute.py can read the 'applied' list for reconciliation)
-    sys.stdout.write(json.dumps({"screenshot_b64": b64, "applied": applied}))
-    sys.stdout.flush()
+    png, mask = capture(actions, width, height, marks, sandbox, sandbox_reset)
+    applied = [a for a, ok in zip(actions, mask) if ok]
+
+    # Output JSON. execute.py calls capture() in-process; this command-line
+    # entry point is kept only for standalone use.
+    # Base64 never needs JSON escaping, so the payload is spliced in as raw
+    # bytes rather than decoded, re-scanned by json.dumps and re-encoded.
+    out = sys.stdout.buffer
+    out.write(b'{"screenshot_b64": "')
+    out.write(base64.b64encode(png))
+    out.write(b'", "applied": ' + json.dumps(applied).encode("ascii"))
+    out.write(b', "applied_mask": ' + json.dumps(mask).encode("ascii") + b"}")
+    out.flush()
 
 
 if __name__ == "__main__":
@@ -5,9 +5,10 @@ SYSTEM: FRANZ — Agentic Visual Loop for Windows 11 (Python 3.13, stdlib only)
 
 BIGGER PICTURE:
     This file holds VLM sampling parameters that main.py reads each turn.
-    main.py calls `importlib.reload(config)` at the start of every loop
-    iteration, so you can edit these values while the pipeline is running
-    and they take effect on the very next turn — no restart required.
+    At the start of every loop iteration main.py checks this file's mtime
+    and calls `importlib.reload(config)` if it changed, so you can edit
+    these values while the pipeline is running and they take effect on the
+    very next turn — no restart required.
 
     If this file has a syntax error at reload time, main.py catches the
     exception, logs a warning, and keeps using the previous values. The
@@ -14,13 +14,15 @@ BIGGER PICTURE:
              - Otherwise: the action is recorded as "executed" but no physical
                input is sent. The sandbox canvas in capture.py will render the
                visual effect instead.
-        4. The list of executed canonical actions is forwarded to capture.py,
-           which produces a screenshot (real or sandbox) with optional marks.
-        5. This file returns a JSON result to main.py via stdout.
+        4. The list of executed canonical actions is handed to capture.py
+           (imported in-process), which produces a screenshot (real or
+           sandbox) with optional marks.
+        5. This file returns a JSON result line followed by the raw PNG to
+           main.py via stdout.
 
     The pipeline data flow:
-        main.py  ──stdin JSON──►  execute.py  ──stdin JSON──►  capture.py
-                 ◄─stdout JSON──             ◄──stdout JSON──
+        main.py  ──stdin JSON──►  execute.py  ──capture()──►  capture.py
+                 ◄─JSON line + PNG──         ◄──(png, applied_mask)──
 
 SST GUARANTEE:
     This file NEVER modifies, stores, or re-emits the VLM text ("raw").
@@ -52,11 +54,11 @@ FILE PIPELINE:
         width, height: int        — output screenshot dimensions
         marks: bool               — draw red visual marks on screenshot
 
-    OUTPUTS (stdout JSON to main.py):
+    OUTPUTS (stdout to main.py: one JSON line, then the PNG bytes):
         executed: list[str]       — canonical actions that were accepted AND applied
         noted: list[str]          — ignored/unparsed/gated/unapplied actions
         wants_screenshot: bool    — True if VLM requested screenshot()
-        screenshot_b64: str       — base64 PNG from capture.py
+        <after the newline>       — raw PNG from capture.py (empty on failure)
 
 RUNTIME:
     - Windows 11, Python 3.13+
@@ -67,10 +69,11 @@ import ast
 import ctypes
 import ctypes.wintypes
 import json
-import subprocess
+import re
 import sys
 import time
-from pathlib import Path
+import traceback
+from collections.abc import Callable
 from typing import Final
 
 # ---------------------------------------------------------------------------
@@ -78,10 +81,12 @@ from typing import Final
 # ---------------------------------------------------------------------------
 
 _MOVE_STEPS: Final[int] = 20
-_STEP_DELAY: Final[float] = 0.01
 _CLICK_DELAY: Final[float] = 0.12
 
-CAPTURE_SCRIPT: Final[Path] = Path(__file__).parent / "capture.py"
+# Smoothstep t*t*(3 - 2t) sampled at each move step, computed once.
+_SMOOTH_CURVE: Final[tuple[float, ...]] = tuple(
+    t * t * (3.0 - 2.0 * t) for t in (i / _MOVE_STEPS for i in range(_MOVE_STEPS + 1))
+)
 
 # ---------------------------------------------------------------------------
 # Win32 initialization (DPI awareness + screen metrics)
@@ -94,6 +99,10 @@ _user32: Final[ctypes.WinDLL] = ctypes.WinDLL("user32", use_last_error=True)
 _screen_w: Final[int] = _user32.GetSystemMetrics(0)
 _screen_h: Final[int] = _user32.GetSystemMetrics(1)
 
+# Divisors mapping a pixel onto SendInput's 0..65535 absolute range.
+_ABS_DIV_X: Final[int] = max(1, _screen_w - 1)
+_ABS_DIV_Y: Final[int] = max(1, _screen_h - 1)
+
 # ---------------------------------------------------------------------------
 # Action language
 # ---------------------------------------------------------------------------
@@ -156,50 +165,77 @@ class INPUT(ctypes.Structure):
 _user32.SendInput.argtypes = (ctypes.c_uint, ctypes.POINTER(INPUT), ctypes.c_int)
 _user32.SendInput.restype = ctypes.c_uint
 
+# Scratch array every batch is written into in place, so sending does not
+# build one INPUT per event and then copy them all into a fresh array.
+# Larger batches (long typed text) get a one-off array instead.
+_INPUT_BUF_CAP: Final[int] = 256
+_INPUT_BUF: Final[ctypes.Array[INPUT]] = (INPUT * _INPUT_BUF_CAP)()
+
 
 # ---------------------------------------------------------------------------
 # Win32 SendInput helpers
 # ---------------------------------------------------------------------------
 
-def _send_inputs(items: list[INPUT]) -> None:
-    n = len(items)
+def _input_array(n: int) -> ctypes.Array[INPUT]:
+    return _INPUT_BUF if n <= _INPUT_BUF_CAP else (INPUT * n)()
+
+
+def _send_inputs(arr: ctypes.Array[INPUT], n: int) -> None:
+    """Inject the first *n* entries of *arr* in one SendInput call."""
     if n <= 0:
         return
-    arr = (INPUT * n)(*items)
     sent = _user32.SendInput(n, arr, ctypes.sizeof(INPUT))
     if sent != n:
         raise OSError(ctypes.get_last_error())
 
 
-def _send_mouse(flags: int, abs_x: int | None = None, abs_y: int | None = None) -> None:
-    i = INPUT()
-    i.type = INPUT_MOUSE
-    dx = 0
-    dy = 0
-    f = flags
+def _set_mouse(
+    arr: ctypes.Array[INPUT], i: int, flags: int, abs_x: int | None = None, abs_y: int | None = None
+) -> None:
+    rec = arr[i]
+    rec.type = INPUT_MOUSE
+    mi = rec.u.mi
     if abs_x is not None and abs_y is not None:
-        dx = abs_x
-        dy = abs_y
-        f |= MOUSEEVENTF_ABSOLUTE | MOUSEEVENTF_MOVE
-    i.u.mi = MOUSEINPUT(dx, dy, 0, f, 0, 0)
-    _send_inputs([i])
+        mi.dx = abs_x
+        mi.dy = abs_y
+        flags |= MOUSEEVENTF_ABSOLUTE | MOUSEEVENTF_MOVE
+    else:
+        mi.dx = 0
+        mi.dy = 0
+    mi.mouseData = 0
+    mi.dwFlags = flags
+    mi.time = 0
+    mi.dwExtraInfo = 0
+
+
+def _set_key(arr: ctypes.Array[INPUT], i: int, code: int, flags: int) -> None:
+    rec = arr[i]
+    rec.type = INPUT_KEYBOARD
+    ki = rec.u.ki
+    ki.wVk = 0
+    ki.wScan = code
+    ki.dwFlags = flags
+    ki.time = 0
+    ki.dwExtraInfo = 0
+
+
+def _send_mouse(flags: int, abs_x: int | None = None, abs_y: int | None = None) -> None:
+    _set_mouse(_INPUT_BUF, 0, flags, abs_x, abs_y)
+    _send_inputs(_INPUT_BUF, 1)
 
 
 def _send_unicode_text(text: str) -> None:
-    items: list[INPUT] = []
-    for ch in text:
-        if ch == "\r":
-            continue
-        code = 0x000D if ch == "\n" else ord(ch)
-        down = INPUT()
-        down.type = INPUT_KEYBOARD
-        down.u.ki = KEYBDINPUT(0, code, KEYEVENTF_UNICODE, 0, 0)
-        up = INPUT()
-        up.type = INPUT_KEYBOARD
-        up.u.ki = KEYBDINPUT(0, code, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP, 0, 0)
-        items.append(down)
-        items.append(up)
-    _send_inputs(items)
+    # KEYEVENTF_UNICODE takes UTF-16 code units, so characters outside the
+    # BMP go out as their surrogate pair. "\n" is sent as Enter (CR).
+    units = memoryview(
+        text.replace("\r", "").replace("\n", "\r").encode("utf-16-le", "surrogatepass")
+    ).cast("H")
+    n = 2 * len(units)
+    arr = _input_array(n)
+    for i, code in enumerate(units):
+        _set_key(arr, 2 * i, code, KEYEVENTF_UNICODE)
+        _set_key(arr, 2 * i + 1, code, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP)
+    _send_inputs(arr, n)
 
 
 # ---------------------------------------------------------------------------
@@ -207,16 +243,17 @@ def _send_unicode_text(text: str) -> None:
 # ---------------------------------------------------------------------------
 
 def _to_px(v: int, dim: int) -> int:
-    v = max(0, min(1000, v))
+    v = 0 if v < 0 else 1000 if v > 1000 else v
     return int((v / 1000) * dim)
 
 
 def _to_abs_65535(x_px: int, y_px: int) -> tuple[int, int]:
-    ax = int((x_px / max(1, _screen_w - 1)) * 65535)
-    ay = int((y_px / max(1, _screen_h - 1)) * 65535)
-    ax = max(0, min(65535, ax))
-    ay = max(0, min(65535, ay))
-    return ax, ay
+    ax = int((x_px / _ABS_DIV_X) * 65535)
+    ay = int((y_px / _ABS_DIV_Y) * 65535)
+    return (
+        0 if ax < 0 else 65535 if ax > 65535 else ax,
+        0 if ay < 0 else 65535 if ay > 65535 else ay,
+    )
 
 
 def _cursor_pos() -> tuple[int, int]:
@@ -229,45 +266,61 @@ def _cursor_pos() -> tuple[int, int]:
 # Physical input actions
 # ---------------------------------------------------------------------------
 
-def _smooth_move(tx_px: int, ty_px: int) -> None:
-    sx, sy = _cursor_pos()
-    dx, dy = tx_px - sx, ty_px - sy
-    for i in range(_MOVE_STEPS + 1):
-        t = i / _MOVE_STEPS
-        t = t * t * (3.0 - 2.0 * t)  # smoothstep
-        x = int(sx + dx * t)
-        y = int(sy + dy * t)
-        ax, ay = _to_abs_65535(x, y)
-        _send_mouse(0, ax, ay)
-        time.sleep(_STEP_DELAY)
+def _set_move(arr: ctypes.Array[INPUT], tx_px: int, ty_px: int) -> int:
+    """Write the smoothstep path from the cursor to the target into *arr*.
 
+    The path occupies the first len(_SMOOTH_CURVE) entries, as absolute
+    moves; that count is returned as the index of the next free entry.
+    Only the two endpoints go through the pixel mapping; the steps in
+    between are interpolated in absolute units, and t = 0 / t = 1 land
+    exactly on the mapped start and target.
+    """
+    sx, sy = _to_abs_65535(*_cursor_pos())
+    tx, ty = _to_abs_65535(tx_px, ty_px)
+    dx, dy = tx - sx, ty - sy
+    for i, t in enumerate(_SMOOTH_CURVE):
+        _set_mouse(arr, i, 0, int(sx + dx * t), int(sy + dy * t))
+    return len(_SMOOTH_CURVE)
+
+
+# Each high-level action is handed to SendInput as one array (the whole
+# move path plus the button events that belong to it), so it is injected
+# in a single call and cannot interleave with other input. The remaining
+# sleeps sit between separate actions, or between the phases of a drag,
+# which the target application has to observe one at a time. On Windows,
+# time.sleep() waits on a high-resolution waitable timer since Python 3.11,
+# so these delays are not rounded up to the 15.6 ms system tick and need no
+# timeBeginPeriod() call.
 
-def _mouse_click(down_flag: int, up_flag: int) -> None:
-    _send_mouse(down_flag)
-    time.sleep(0.02)
-    _send_mouse(up_flag)
+def _smooth_move(tx_px: int, ty_px: int) -> None:
+    _send_inputs(_INPUT_BUF, _set_move(_INPUT_BUF, tx_px, ty_px))
 
 
 def _type_text(text: str) -> None:
     _send_unicode_text(text)
 
 
-def _do_left_click(x: int, y: int) -> None:
-    _smooth_move(_to_px(x, _screen_w), _to_px(y, _screen_h))
+def _do_click(x: int, y: int, down_flag: int, up_flag: int, count: int = 1) -> None:
+    arr = _input_array(len(_SMOOTH_CURVE) + 2 * count)
+    n = _set_move(arr, _to_px(x, _screen_w), _to_px(y, _screen_h))
+    for _ in range(count):
+        _set_mouse(arr, n, down_flag)
+        _set_mouse(arr, n + 1, up_flag)
+        n += 2
+    _send_inputs(arr, n)
     time.sleep(_CLICK_DELAY)
-    _mouse_click(MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP)
+
+
+def _do_left_click(x: int, y: int) -> None:
+    _do_click(x, y, MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP)
 
 
 def _do_right_click(x: int, y: int) -> None:
-    _smooth_move(_to_px(x, _screen_w), _to_px(y, _screen_h))
-    time.sleep(_CLICK_DELAY)
-    _mouse_click(MOUSEEVENTF_RIGHTDOWN, MOUSEEVENTF_RIGHTUP)
+    _do_click(x, y, MOUSEEVENTF_RIGHTDOWN, MOUSEEVENTF_RIGHTUP)
 
 
 def _do_double_left_click(x: int, y: int) -> None:
-    _do_left_click(x, y)
-    time.sleep(0.06)
-    _do_left_click(x, y)
+    _do_click(x, y, MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP, 2)
 
 
 def _do_drag(x1: int, y1: int, x2: int, y2: int) -> None:
@@ -292,33 +345,44 @@ def _parse_actions(raw: str) -> list[str]:
     function call (contains '(' and ends with ')').
     """
     out: list[str] = []
+    fallback: list[str] = []
     section = ""
     saw_actions_header = False
 
+    # One pass collects both streams; the fallback stops growing once an
+    # ACTIONS header makes it irrelevant.
     for line in raw.splitlines():
         s = line.strip()
-        u = s.upper().rstrip(":")
-        if u == "NARRATIVE":
-            section = "narrative"
-            continue
-        if u == "ACTIONS":
-            section = "actions"
-            saw_actions_header = True
+        if not s:
             continue
-        if section == "actions" and s:
+        # Only these first/last characters can upper-case into a header
+        # ("\u00df" and "\u017f" upper-case to "SS" and "S").
+        if s[0] in "ANan" and s[-1] in ":EeSs\u00df\u017f":
+            u = s.upper().rstrip(":")
+            if u == "NARRATIVE":
+                section = "narrative"
+                continue
+            if u == "ACTIONS":
+                section = "actions"
+                saw_actions_header = True
+                continue
+        if section == "actions":
             out.append(s)
+        elif not saw_actions_header and s[-1] == ")" and "(" in s:
+            # Fallback: accept call-like lines even without ACTIONS header
+            fallback.append(s)
 
-    if saw_actions_header:
-        return out
+    return out if saw_actions_header else fallback
 
-    # Fallback: accept call-like lines even without ACTIONS header
-    for line in raw.splitlines():
-        s = line.strip()
-        if not s:
-            continue
-        if "(" in s and s.endswith(")"):
-            out.append(s)
-    return out
+
+# Most VLM actions are a plain name with unsigned decimal int arguments;
+# those skip the full Python compile. Any other shape (strings, keywords,
+# signs, comments, ...) takes the AST path, so accepted input is unchanged.
+_INT_CALL_RE: Final[re.Pattern[str]] = re.compile(
+    r"([A-Za-z_][A-Za-z0-9_]*)[ \t]*\("
+    r"[ \t]*((?:0|[1-9][0-9]*)(?:[ \t]*,[ \t]*(?:0|[1-9][0-9]*))*)?[ \t]*"
+    r"\)"
+)
 
 
 def _parse_call(line: str) -> tuple[str, list[object], dict[str, object]] | None:
@@ -327,8 +391,19 @@ def _parse_call(line: str) -> tuple[str, list[object], dict[str, object]] | None
     Only accepts: FunctionName(literal_args, key=literal_value)
     Rejects any non-literal expression (no variables, no operators).
     """
+    s = line.strip()
+    if s[-2:] == "()" and s[:-2] in KNOWN_FUNCTIONS:
+        # Bare screenshot() / focus() and friends: nothing to parse at all.
+        return ALIASES.get(s[:-2], s[:-2]), [], {}
+    m = _INT_CALL_RE.fullmatch(s)
+    if m is not None:
+        name = m[1]
+        if name not in KNOWN_FUNCTIONS:
+            return None
+        body = m[2]
+        return ALIASES.get(name, name), [int(v) for v in body.split(",")] if body else [], {}
     try:
-        node = ast.parse(line.strip(), mode="eval").body
+        node = ast.parse(s, mode="eval").body
     except SyntaxError:
         return None
     if not isinstance(node, ast.Call):
@@ -362,74 +437,96 @@ def _parse_call(line: str) -> tuple[str, list[object], dict[str, object]] | None
 # Argument extraction helpers
 # ---------------------------------------------------------------------------
 
+# Parsed arguments are almost always already an int / str literal; those are
+# returned as-is, and only other constants go through the coercion.
+
 def _arg_int(args: list[object], kwargs: dict[str, object], idx: int, key: str) -> int | None:
     if idx < len(args):
-        try:
-            return int(args[idx])  # type: ignore[arg-type]
-        except Exception:
-            return None
-    if key in kwargs:
-        try:
-            return int(kwargs[key])  # type: ignore[arg-type]
-        except Exception:
-            return None
-    return None
+        v = args[idx]
+    elif key in kwargs:
+        v = kwargs[key]
+    else:
+        return None
+    if type(v) is int:
+        return v
+    try:
+        return int(v)  # type: ignore[arg-type]
+    except Exception:
+        return None
 
 
 def _arg_str(args: list[object], kwargs: dict[str, object], idx: int, key: str) -> str | None:
     if idx < len(args):
-        try:
-            return str(args[idx])
-        except Exception:
-            return None
-    if key in kwargs:
-        try:
-            return str(kwargs[key])
-        except Exception:
-            return None
-    return None
+        v = args[idx]
+    elif key in kwargs:
+        v = kwargs[key]
+    else:
+        return None
+    if type(v) is str:
+        return v
+    try:
+        return str(v)
+    except Exception:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Action dispatch
+# ---------------------------------------------------------------------------
+
+# Executable actions: the physical handler, the extractor for its arguments
+# and the keyword name of each argument, in positional order.
+_ACTIONS: Final[
+    dict[str, tuple[Callable[..., None], Callable[..., object | None], tuple[str, ...]]]
+] = {
+    "left_click": (_do_left_click, _arg_int, ("x", "y")),
+    "right_click": (_do_right_click, _arg_int, ("x", "y")),
+    "double_left_click": (_do_double_left_click, _arg_int, ("x", "y")),
+    "drag": (_do_drag, _arg_int, ("x1", "y1", "x2", "y2")),
+    "type": (_type_text, _arg_str, ("text",)),
+}
 
 
 # ---------------------------------------------------------------------------
 # Canonical form (for feedback and capture.py)
 # ---------------------------------------------------------------------------
 
-def _canon(name: str, args: list[object], kwargs: dict[str, object]) -> str:
+def _action_values(name: str, args: list[object], kwargs: dict[str, object]) -> list[object | None]:
+    """Extract the arguments of an executable action (None where missing).
+
+    Done once per action: the same values feed _canon and the handler.
+    Names without an _ACTIONS entry have no arguments.
+    """
+    entry = _ACTIONS.get(name)
+    if entry is None:
+        return []
+    _, extract, keys = entry
+    return [extract(args, kwargs, i, key) for i, key in enumerate(keys)]
+
+
+def _canon(name: str, values: list[object | None]) -> str:
     """Produce a canonical string representation of a parsed action.
 
-    Note: if required args are missing, defaults to zero/empty. This
-    canonical form is used for logging and for capture.py to re-parse.
+    'values' comes from _action_values. Note: if required args are
+    missing, defaults to zero/empty. This canonical form is used for
+    logging and for capture.py to re-parse.
     """
     if name == "type":
-        t = _arg_str(args, kwargs, 0, "text")
+        t = values[0]
         if t is None:
             t = ""
         return f"type({json.dumps(t)})"
 
-    if name in ("left_click", "right_click", "double_left_click"):
-        x = _arg_int(args, kwargs, 0, "x")
-        y = _arg_int(args, kwargs, 1, "y")
-        if x is None or y is None:
-            x, y = 0, 0
-        return f"{name}({int(x)}, {int(y)})"
-
-    if name == "drag":
-        x1 = _arg_int(args, kwargs, 0, "x1")
-        y1 = _arg_int(args, kwargs, 1, "y1")
-        x2 = _arg_int(args, kwargs, 2, "x2")
-        y2 = _arg_int(args, kwargs, 3, "y2")
-        if None in (x1, y1, x2, y2):
-            x1, y1, x2, y2 = 0, 0, 0, 0
-        return f"drag({int(x1)}, {int(y1)}, {int(x2)}, {int(y2)})"
-
-    if name in ("screenshot", "focus"):
-        return f"{name}()"
+    if values:
+        if None in values:
+            values = [0] * len(values)
+        return f"{name}({', '.join(map(str, values))})"
 
     return name + "()"
 
 
 # ---------------------------------------------------------------------------
-# Capture subprocess
+# Capture (in-process)
 # ---------------------------------------------------------------------------
 
 def _run_capture(
@@ -439,60 +536,36 @@ def _run_capture(
     marks: bool,
     sandbox: bool,
     sandbox_reset: bool,
-) -> tuple[str, list[str]]:
-    """Call capture.py and return (screenshot_b64, applied_actions).
+) -> tuple[bytes | bytearray, list[bool]]:
+    """Call capture.capture() and return (png, applied_mask).
+
+    capture.py is imported rather than spawned: this process is already a
+    fresh interpreter per turn, so a second one would only add its startup
+    and a round trip of the image over pipes.
 
-    capture.py returns JSON: {"screenshot_b64": str, "applied": list[str]}
-    The "applied" list tells us which actions were actually rendered on the
-    canvas (relevant in sandbox mode where e.g. type() may be skipped if
-    there's no prior click position).
+    The "applied" mask runs parallel to 'actions' and tells us which were
+    actually rendered on the canvas (relevant in sandbox mode where e.g.
+    type() may be skipped if there's no prior click position).
 
-    On failure: logs to stderr and returns ("", actions) as fallback
+    On failure: logs to stderr and returns (b"", all True) as fallback
     (assumes all actions were applied — this is the safe default for
     non-sandbox mode where capture.py just takes a screenshot).
     """
-    payload = json.dumps(
-        {
-            "actions": actions,
-            "width": width,
-            "height": height,
-            "marks": marks,
-            "sandbox": sandbox,
-            "sandbox_reset": sandbox_reset,
-        }
-    )
-    r = subprocess.run(
-        [sys.executable, str(CAPTURE_SCRIPT)],
-        input=payload,
-        capture_output=True,
-        text=True,
-    )
+    try:
+        import capture
 
-    # Bug #3 fix: surface capture.py failures
-    if r.returncode != 0:
-        sys.stderr.write(f"[execute] capture.py failed (rc={r.returncode})\n")
-        if r.stderr:
-            sys.stderr.write(f"[execute] capture.py stderr:\n{r.stderr[:1000]}\n")
+        png, mask = capture.capture(actions, width, height, marks, sandbox, sandbox_reset)
+    except Exception as e:
+        # Bug #3 fix: surface capture.py failures
+        sys.stderr.write(f"[execute] capture.py failed: {type(e).__name__}: {e}\n")
+        sys.stderr.write(f"[execute] capture.py traceback:\n{traceback.format_exc()[-1000:]}\n")
         sys.stderr.flush()
+        return b"", [True] * len(actions)
 
-    if not r.stdout:
-        sys.stderr.write("[execute] capture.py returned empty stdout\n")
+    if not png:
+        sys.stderr.write("[execute] capture.py returned an empty screenshot\n")
         sys.stderr.flush()
-        return "", actions
-
-    try:
-        obj = json.loads(r.stdout)
-        b64 = str(obj.get("screenshot_b64", ""))
-        applied = obj.get("applied", actions)
-        if not isinstance(applied, list):
-            applied = actions
-        return b64, [str(a) for a in applied]
-    except json.JSONDecodeError:
-        sys.stderr.write(
-            f"[execute] capture.py produced invalid JSON: {r.stdout[:200]!r}\n"
-        )
-        sys.stderr.flush()
-        return "", actions
+    return png, mask
 
 
 # ---------------------------------------------------------------------------
@@ -500,7 +573,9 @@ def _run_capture(
 # ---------------------------------------------------------------------------
 
 def main() -> None:
-    request = json.loads(sys.stdin.read() or "{}")
+    # Raw bytes: one read of the whole pipe, no text-layer decoding;
+    # json.loads detects the encoding itself.
+    request = json.loads(sys.stdin.buffer.read() or b"{}")
     raw = str(request.get("raw", ""))
     tools: dict[str, bool] = (
         request.get("tools", {})
@@ -531,7 +606,8 @@ def main() -> None:
             noted.append(line)
             continue
         name, args, kwargs = parsed
-        canon = _canon(name, args, kwargs)
+        values = _action_values(name, args, kwargs)
+        canon = _canon(name, values)
 
         # screenshot() and focus() are noted, never "executed"
         if name == "screenshot":
@@ -547,61 +623,25 @@ def main() -> None:
             noted.append(canon)
             continue
 
-        try:
-            match name:
-                case "left_click":
-                    x = _arg_int(args, kwargs, 0, "x")
-                    y = _arg_int(args, kwargs, 1, "y")
-                    if x is None or y is None:
-                        noted.append(canon)
-                    else:
-                        if physical_execute:
-                            _do_left_click(x, y)
-                        executed.append(canon)
-                case "right_click":
-                    x = _arg_int(args, kwargs, 0, "x")
-                    y = _arg_int(args, kwargs, 1, "y")
-                    if x is None or y is None:
-                        noted.append(canon)
-                    else:
-                        if physical_execute:
-                            _do_right_click(x, y)
-                        executed.append(canon)
-                case "double_left_click":
-                    x = _arg_int(args, kwargs, 0, "x")
-                    y = _arg_int(args, kwargs, 1, "y")
-                    if x is None or y is None:
-                        noted.append(canon)
-                    else:
-                        if physical_execute:
-                            _do_double_left_click(x, y)
-                        executed.append(canon)
-                case "drag":
-                    x1 = _arg_int(args, kwargs, 0, "x1")
-                    y1 = _arg_int(args, kwargs, 1, "y1")
-                    x2 = _arg_int(args, kwargs, 2, "x2")
-                    y2 = _arg_int(args, kwargs, 3, "y2")
-                    if None in (x1, y1, x2, y2):
-                        noted.append(canon)
-                    else:
-                        if physical_execute:
-                            _do_drag(int(x1), int(y1), int(x2), int(y2))
-                        executed.append(canon)
-                case "type":
-                    t = _arg_str(args, kwargs, 0, "text")
-                    if t is None:
-                        noted.append(canon)
-                    else:
-                        if physical_execute:
-                            _type_text(t)
-                        executed.append(canon)
-                case _:
-                    noted.append(canon)
-        except Exception:
+        entry = _ACTIONS.get(name)
+        if entry is None or None in values:
             noted.append(canon)
+            continue
+        if physical_execute:
+            handler = entry[0]
+            # Only the Win32 input path can fail here. A failed action is
+            # noted rather than fatal, but logged so real bugs stay visible.
+            try:
+                handler(*values)
+            except Exception as e:
+                sys.stderr.write(f"[execute] {canon} failed: {type(e).__name__}: {e}\n")
+                sys.stderr.flush()
+                noted.append(canon)
+                continue
+        executed.append(canon)
 
     # --- Capture screenshot and reconcile executed vs actually-applied ---
-    screenshot_b64, applied = _run_capture(
+    png, applied_mask = _run_capture(
         executed, width, height, marks, sandbox, sandbox_reset
     )
 
@@ -609,26 +649,29 @@ def main() -> None:
     # actually rendered. If an action was "executed" here but NOT applied
     # by capture.py (e.g. type() with no cursor position), move it from
     # executed to noted so the VLM feedback accurately reflects what is
-    # visible on screen.
-    if sandbox:
-        applied_set = set(applied)
-        actually_executed = [a for a in executed if a in applied_set]
-        not_applied = [a for a in executed if a not in applied_set]
-        if not_applied:
-            noted.extend(not_applied)
-            executed = actually_executed
-
-    sys.stdout.write(
+    # visible on screen. The mask is positional, so two identical action
+    # strings with different outcomes are each placed correctly.
+    if sandbox and not all(applied_mask):
+        noted.extend(a for a, ok in zip(executed, applied_mask) if not ok)
+        executed = [a for a, ok in zip(executed, applied_mask) if ok]
+
+    # The image goes out as raw PNG after the JSON line rather than as
+    # base64 inside it. json.dumps never emits a bare newline, so main.py
+    # splits on the first one.
+    out = sys.stdout.buffer
+    out.write(
         json.dumps(
             {
                 "executed": executed,
                 "noted": noted,
                 "wants_screenshot": wants_screenshot,
-                "screenshot_b64": screenshot_b64,
-            }
-        )
+            },
+            separators=(",", ":"),
+        ).encode("ascii")
+        + b"\n"
     )
-    sys.stdout.flush()
+    out.write(png)
+    out.flush()
 
 
 if __name__ == "__main__":
@@ -21,7 +21,7 @@ BIGGER PICTURE:
         execute.py  — parses actions from VLM text, executes or simulates them,
                        delegates to capture.py for the screenshot.
         capture.py  — produces a screenshot (real desktop or sandbox canvas),
-                       draws visual marks, returns base64 PNG.
+                       draws visual marks, returns PNG bytes.
         config.py   — hot-reloadable sampling parameters (temperature, etc.).
         panel.py    — optional Wireshark-like proxy/UI; not required for pipeline.
 
@@ -41,7 +41,7 @@ SINGLE SOURCE OF TRUTH (SST) — ABSOLUTE RULE:
 FILE PIPELINE:
     INPUTS:
         - state.story  — prior raw VLM output text (verbatim, from state.json)
-        - execute.py   — returns: executed[], noted[], screenshot_b64
+        - execute.py   — returns: executed[], noted[], screenshot PNG
         - config.py    — TEMPERATURE, TOP_P, MAX_TOKENS (hot-reloaded each turn)
     OUTPUTS:
         - stdout       — the next raw VLM output text (verbatim, for monitoring)
@@ -53,15 +53,22 @@ RUNTIME:
     - Stdlib only (no pip dependencies)
 """
 
+import atexit
 import base64
+import http.client
 import importlib
 import json
+import json.encoder
+import os
+import queue
 import subprocess
 import sys
+import threading
 import time
 import traceback
 import urllib.error
-import urllib.request
+import urllib.parse
+from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
@@ -74,6 +81,7 @@ import config as franz_config
 # ---------------------------------------------------------------------------
 
 API: Final[str] = "http://localhost:1234/v1/chat/completions"
+_API_URL: Final[urllib.parse.SplitResult] = urllib.parse.urlsplit(API)
 MODEL: Final[str] = "qwen3-vl-2b-instruct-1m"
 
 WIDTH: Final[int] = 512
@@ -88,9 +96,17 @@ PHYSICAL_EXECUTION: Final[bool] = False
 DEBUG_DUMP: Final[bool] = True
 
 EXECUTE_SCRIPT: Final[Path] = Path(__file__).parent / "execute.py"
-SANDBOX_CANVAS: Final[Path] = Path(__file__).parent / "sandbox_canvas.bmp"
+SANDBOX_CANVAS: Final[Path] = Path(__file__).parent / "sandbox_canvas.rgba"
 STATE_FILE: Final[Path] = Path(__file__).parent / "state.json"
 
+# Machine-read JSON (VLM request, executor request, state.json) is written
+# without the default spaces after "," and ":". The encoder is shared:
+# json.dumps with any non-default argument builds a new one per call.
+_COMPACT: Final[tuple[str, str]] = (",", ":")
+_json_compact: Final[Callable[[object], str]] = json.JSONEncoder(
+    separators=_COMPACT
+).encode
+
 # That commented system prompt is the "Entity" seed (its trying different approaches even with just blank sandbox screen - this is no joke
 
 # SYSTEM_PROMPT: Final[str] = """\
@@ -167,6 +183,51 @@ class ToolConfig:
 
 
 TOOLS: Final[ToolConfig] = ToolConfig()
+_TOOLS_DICT: Final[dict[str, bool]] = TOOLS.to_dict()
+
+
+# ---------------------------------------------------------------------------
+# Background file writer
+# ---------------------------------------------------------------------------
+
+# state.json and the debug dump are written by one worker thread, so disk
+# latency never holds up the next turn. Jobs run in order, and each file
+# is written under a temporary name and renamed into place: a crash leaves
+# the old file or the new one, never a torn one.
+_write_queue: queue.Queue[tuple[Path, bytes] | None] = queue.Queue()
+_writer: threading.Thread | None = None
+
+
+def _writer_loop() -> None:
+    while (job := _write_queue.get()) is not None:
+        path, data = job
+        tmp = path.with_name(path.name + ".tmp")
+        try:
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except Exception:
+            try:
+                tmp.unlink(missing_ok=True)
+            except Exception:
+                pass
+
+
+def _write_later(path: Path, data: bytes) -> None:
+    """Queue a best-effort atomic write of data to path."""
+    global _writer
+    if _writer is None:
+        _writer = threading.Thread(target=_writer_loop, daemon=True)
+        _writer.start()
+    _write_queue.put((path, data))
+
+
+def _flush_writes() -> None:
+    if _writer is not None:
+        _write_queue.put(None)
+        _writer.join()
+
+
+atexit.register(_flush_writes)
 
 
 # ---------------------------------------------------------------------------
@@ -196,24 +257,28 @@ def _load_state() -> PipelineState:
 def _save_state(
     st: PipelineState,
     prev_story: str,
-    raw: str,
     executor_result: dict[str, object],
+    timestamp: str,
 ) -> None:
-    """Persist current pipeline state.  Best-effort — never crashes the loop."""
+    """Persist current pipeline state.  Best-effort — never crashes the loop.
+
+    "story" already is this turn's raw VLM output, so it is not written a
+    second time under "vlm_raw": the file is rewritten whole every turn
+    and the story is by far its largest field.
+    """
     try:
         out = {
             "turn": st.turn,
             "story": st.story,
             "prev_story": prev_story,
-            "vlm_raw": raw,
             "executed": executor_result.get("executed", []),
             "noted": executor_result.get("noted", []),
             "wants_screenshot": executor_result.get("wants_screenshot", False),
             "execute_actions": EXECUTE_ACTIONS,
-            "tools": TOOLS.to_dict(),
-            "timestamp": datetime.now().isoformat(),
+            "tools": _TOOLS_DICT,
+            "timestamp": timestamp,
         }
-        STATE_FILE.write_text(json.dumps(out, indent=2), encoding="utf-8")
+        _write_later(STATE_FILE, _json_compact(out).encode("utf-8"))
     except Exception:
         pass
 
@@ -222,6 +287,13 @@ def _save_state(
 # Sampling parameters (hot-reloaded from config.py each turn)
 # ---------------------------------------------------------------------------
 
+def _config_mtime() -> int | None:
+    try:
+        return os.stat(franz_config.__file__).st_mtime_ns
+    except (OSError, TypeError):
+        return None
+
+
 def _sampling_dict() -> dict[str, float | int]:
     return {
         "temperature": float(franz_config.TEMPERATURE),
@@ -234,55 +306,158 @@ def _sampling_dict() -> dict[str, float | int]:
 # VLM inference
 # ---------------------------------------------------------------------------
 
-def _infer(screenshot_b64: str, prev_story: str, feedback: str) -> str:
-    """Send a request to the VLM and return its raw text response.
+# One HTTP/1.1 connection to the VLM endpoint, kept alive across turns so a
+# turn does not pay a fresh TCP connect. If the server closed it after the
+# previous response, http.client simply reconnects on the next request.
+_vlm_conn: http.client.HTTPConnection | None = None
+_VLM_HEADERS: Final[dict[str, str]] = {"Content-Type": "application/json"}
+
+
+def _vlm_post(body: bytes) -> bytes:
+    """POST 'body' to the VLM endpoint and return the response body.
+
+    A reused socket the server has silently dropped in the meantime fails
+    on first use; that one case is retried at once on a fresh connection
+    instead of costing a backoff round in _infer. HTTP errors raise
+    urllib.error.HTTPError, as urlopen did.
+    """
+    global _vlm_conn
+    if _vlm_conn is None:
+        _vlm_conn = http.client.HTTPConnection(_API_URL.hostname, _API_URL.port, timeout=10)
+    conn = _vlm_conn
+    while True:
+        reused = conn.sock is not None
+        try:
+            conn.request("POST", _API_URL.path, body, _VLM_HEADERS)
+            resp = conn.getresponse()
+            data = resp.read()
+            break
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+            conn.close()
+            if not reused:
+                raise
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            raise
+    if resp.status >= 400:
+        raise urllib.error.HTTPError(API, resp.status, resp.reason, resp.headers, None)
+    return data
+
+
+# Placeholders for the per-turn fields of the request body. json.dumps
+# escapes the NUL, so they cannot collide with anything in the template.
+_STORY_SLOT: Final[str] = "\x00story"
+_FEEDBACK_SLOT: Final[str] = "\x00feedback"
+_IMAGE_SLOT: Final[str] = "\x00image"
+
+
+def _payload_template() -> tuple[bytes, bytes, bytes, bytes]:
+    """The fixed parts of the VLM request body, split around the per-turn fields.
 
     Message layout (SST guarantee):
         messages[0] — system prompt (fixed)
         messages[1] — user #1: prev_story, forwarded VERBATIM (SST)
         messages[2] — user #2: executor feedback text + screenshot image
+
+    The last part stops before the closing brace: the hot-reloaded
+    sampling parameters are appended after it each turn.
     """
     payload: dict[str, object] = {
         "model": MODEL,
         "messages": [
             {"role": "system", "content": SYSTEM_PROMPT},
             # --- SST message: prior VLM output, byte-for-byte unchanged ---
-            {"role": "user", "content": [{"type": "text", "text": prev_story}]},
+            {"role": "user", "content": [{"type": "text", "text": _STORY_SLOT}]},
             # --- Executor feedback + fresh screenshot (separate message) ---
             {
                 "role": "user",
                 "content": [
-                    {"type": "text", "text": feedback},
+                    {"type": "text", "text": _FEEDBACK_SLOT},
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/png;base64,{screenshot_b64}",
+                            "url": f"data:image/png;base64,{_IMAGE_SLOT}",
                         },
                     },
                 ],
             },
         ],
-        **_sampling_dict(),
     }
+    rest = _json_compact(payload)[:-1]
+    parts: list[bytes] = []
+    # The text slots are replaced quotes and all; the image slot sits
+    # inside the data URI string.
+    for slot in (
+        json.dumps(_STORY_SLOT),
+        json.dumps(_FEEDBACK_SLOT),
+        json.dumps(_IMAGE_SLOT)[1:-1],
+    ):
+        head, rest = rest.split(slot)
+        parts.append(head.encode("ascii"))
+    return parts[0], parts[1], parts[2], rest.encode("ascii")
+
+
+_PAYLOAD_PARTS: Final[tuple[bytes, bytes, bytes, bytes]] = _payload_template()
+
+# The C string escaper behind json.dumps(str), called directly: a lone
+# string needs none of the encoder's dispatch.
+_encode_json_str: Final[Callable[[str], str]] = json.encoder.encode_basestring_ascii
+
 
-    body_bytes = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        API, body_bytes, {"Content-Type": "application/json"}
+def _json_str(s: str) -> bytes:
+    """s as a quoted, ASCII-only JSON string."""
+    return _encode_json_str(s).encode("ascii")
+
+
+# Client errors worth retrying: request timeout and rate limiting.
+_RETRYABLE_4XX: Final[frozenset[int]] = frozenset({408, 429})
+
+
+def _infer(screenshot_b64: bytes, prev_story: str, feedback: str) -> str:
+    """Send a request to the VLM and return its raw text response.
+
+    Only the per-turn fields are serialized here; the model, system prompt
+    and message scaffolding come pre-serialized from _PAYLOAD_PARTS. The
+    body is byte-for-byte what json.dumps(payload, separators=_COMPACT)
+    would give.
+    """
+    p0, p1, p2, p3 = _PAYLOAD_PARTS
+    body_bytes = b"".join(
+        (
+            p0,
+            _json_str(prev_story),
+            p1,
+            _json_str(feedback),
+            p2,
+            # Base64 needs no JSON escaping, so it goes in as-is.
+            screenshot_b64,
+            p3,
+            b",",
+            _json_compact(_sampling_dict())[1:].encode("ascii"),
+        )
     )
 
     delay = 0.5
     last_err: Exception | None = None
     for _ in range(5):
         try:
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                body: dict[str, object] = json.load(resp)
+            body: dict[str, object] = json.loads(_vlm_post(body_bytes))
             return body["choices"][0]["message"]["content"]  # type: ignore[index,return-value]
         except (
             urllib.error.URLError,
             urllib.error.HTTPError,
+            http.client.HTTPException,
             TimeoutError,
             OSError,
         ) as e:
+            # A 4xx other than timeout / rate limit means the request itself
+            # was rejected; sending it again cannot succeed.
+            if (
+                isinstance(e, urllib.error.HTTPError)
+                and e.code < 500
+                and e.code not in _RETRYABLE_4XX
+            ):
+                raise RuntimeError(f"VLM rejected the request: {e}") from e
             last_err = e
             time.sleep(delay)
             delay = min(delay * 2.0, 8.0)
@@ -294,51 +469,93 @@ def _infer(screenshot_b64: str, prev_story: str, feedback: str) -> str:
 # Executor subprocess
 # ---------------------------------------------------------------------------
 
+# A turn's executor cannot start before the VLM has answered the previous
+# one, but its interpreter startup and imports can: the next execute.py is
+# spawned as soon as the current one finishes, warms up while the VLM is
+# thinking, and then blocks on stdin until the request is written.
+_spare_executor: subprocess.Popen[bytes] | None = None
+_EXECUTOR_ARGS: Final[tuple[str, str]] = (sys.executable, str(EXECUTE_SCRIPT))
+
+
+def _spawn_executor() -> subprocess.Popen[bytes]:
+    return subprocess.Popen(
+        _EXECUTOR_ARGS,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+
+def _kill_spare_executor() -> None:
+    if _spare_executor is not None:
+        try:
+            _spare_executor.kill()
+            _spare_executor.wait()
+        except Exception:
+            pass
+
+
+atexit.register(_kill_spare_executor)
+
+
+# Everything in the executor request but "raw" is fixed for the process
+# lifetime, so it is serialized once.
+_EXECUTOR_INPUT_TAIL: Final[bytes] = b"," + _json_compact(
+    {
+        "tools": _TOOLS_DICT,
+        "execute": EXECUTE_ACTIONS,
+        "physical_execution": PHYSICAL_EXECUTION,
+        "sandbox": SANDBOX,
+        "sandbox_reset": SANDBOX_RESET,
+        "width": WIDTH,
+        "height": HEIGHT,
+        "marks": VISUAL_MARKS,
+    }
+)[1:].encode("ascii")
+
+
 def _run_executor(raw: str) -> dict[str, object]:
     """Call execute.py as a subprocess and return its JSON result.
 
+    execute.py writes one JSON line and then the raw screenshot PNG, which
+    is returned under "screenshot_png" (b"" if there is none).
+
     On failure (crash, bad JSON), logs to stderr and returns a safe empty
     dict so the pipeline can continue.
     """
-    executor_input = json.dumps(
-        {
-            "raw": raw,
-            "tools": TOOLS.to_dict(),
-            "execute": EXECUTE_ACTIONS,
-            "physical_execution": PHYSICAL_EXECUTION,
-            "sandbox": SANDBOX,
-            "sandbox_reset": SANDBOX_RESET,
-            "width": WIDTH,
-            "height": HEIGHT,
-            "marks": VISUAL_MARKS,
-        }
-    )
-    result = subprocess.run(
-        [sys.executable, str(EXECUTE_SCRIPT)],
-        input=executor_input,
-        capture_output=True,
-        text=True,
-    )
+    global _spare_executor
+    executor_input = b'{"raw":' + _json_str(raw) + _EXECUTOR_INPUT_TAIL
+    # Binary pipes: the request is ASCII JSON and the reply ends in raw PNG
+    # bytes, which only need base64 once, when the VLM request is built.
+    proc = _spare_executor if _spare_executor is not None else _spawn_executor()
+    _spare_executor = None
+    stdout, stderr = proc.communicate(executor_input)
+    try:
+        _spare_executor = _spawn_executor()
+    except OSError:
+        pass  # the next turn spawns (and reports) it synchronously
 
     # --- Bug #2 fix: surface executor failures instead of silent swallow ---
-    if result.returncode != 0:
+    if proc.returncode != 0:
         sys.stderr.write(
-            f"[main] execute.py failed (rc={result.returncode})\n"
+            f"[main] execute.py failed (rc={proc.returncode})\n"
         )
-        if result.stderr:
-            sys.stderr.write(
-                f"[main] execute.py stderr:\n{result.stderr[:1000]}\n"
-            )
+        if stderr:
+            err = stderr[:1000].decode("utf-8", "replace")
+            sys.stderr.write(f"[main] execute.py stderr:\n{err}\n")
         sys.stderr.flush()
 
+    head, _, png = stdout.partition(b"\n")
     try:
-        return json.loads(result.stdout or "{}")
-    except json.JSONDecodeError:
+        result: dict[str, object] = json.loads(head or b"{}")
+    except (json.JSONDecodeError, UnicodeDecodeError):
         sys.stderr.write(
-            f"[main] execute.py produced invalid JSON: {result.stdout[:200]!r}\n"
+            f"[main] execute.py produced invalid JSON: {head[:200]!r}\n"
         )
         sys.stderr.flush()
         return {}
+    result["screenshot_png"] = png
+    return result
 
 
 # ---------------------------------------------------------------------------
@@ -351,15 +568,11 @@ def _dump(
     prev_story: str,
     raw: str,
     executor_result: dict[str, object],
+    timestamp: str,
 ) -> None:
-    screenshot_b64 = str(executor_result.get("screenshot_b64", ""))
-    if screenshot_b64:
-        try:
-            (dump_dir / f"turn_{turn:04d}.png").write_bytes(
-                base64.b64decode(screenshot_b64)
-            )
-        except Exception:
-            pass
+    png = executor_result.get("screenshot_png", b"")
+    if isinstance(png, bytes) and png:
+        _write_later(dump_dir / f"turn_{turn:04d}.png", png)
 
     run_state = {
         "turn": turn,
@@ -369,11 +582,12 @@ def _dump(
         "noted": executor_result.get("noted", []),
         "wants_screenshot": executor_result.get("wants_screenshot", False),
         "execute_actions": EXECUTE_ACTIONS,
-        "tools": TOOLS.to_dict(),
-        "timestamp": datetime.now().isoformat(),
+        "tools": _TOOLS_DICT,
+        "timestamp": timestamp,
     }
-    (dump_dir / f"turn_{turn:04d}.json").write_text(
-        json.dumps(run_state, indent=2), encoding="utf-8"
+    _write_later(
+        dump_dir / f"turn_{turn:04d}.json",
+        json.dumps(run_state, indent=2).encode("utf-8"),
     )
 
 
@@ -394,26 +608,33 @@ def main() -> None:
     time.sleep(1.0)
 
     state = _load_state()
+    config_mtime = _config_mtime()
 
     while True:
         state.turn += 1
 
-        # Hot-reload sampling config (tolerant of syntax errors in config.py)
-        try:
-            importlib.reload(franz_config)
-        except Exception as reload_err:
-            sys.stderr.write(
-                f"[main] config.py reload failed, keeping previous values: "
-                f"{reload_err}\n"
-            )
-            sys.stderr.flush()
+        # Hot-reload sampling config (tolerant of syntax errors in config.py).
+        # A reload re-executes the module, so it only happens once the file
+        # has changed; a broken file is reported once, not every turn.
+        mtime = _config_mtime()
+        if mtime is None or mtime != config_mtime:
+            config_mtime = mtime
+            try:
+                importlib.reload(franz_config)
+            except Exception as reload_err:
+                sys.stderr.write(
+                    f"[main] config.py reload failed, keeping previous values: "
+                    f"{reload_err}\n"
+                )
+                sys.stderr.flush()
 
         # ---- prev_story is the SST: NEVER modify it ----
         prev_story = state.story
 
         # Run executor: parses actions from prev_story, returns feedback + screenshot
         executor_result = _run_executor(prev_story)
-        screenshot_b64 = str(executor_result.get("screenshot_b64", ""))
+        png = executor_result.get("screenshot_png", b"")
+        screenshot_b64 = base64.b64encode(png) if isinstance(png, bytes) else b""
 
         # Build executor feedback (separate from SST, goes into user message #2)
         executed = executor_result.get("executed", [])
@@ -428,17 +649,24 @@ def main() -> None:
         # Call VLM — prev_story forwarded VERBATIM as user message #1
         raw = _infer(screenshot_b64, prev_story, feedback)
 
-        # Emit raw VLM output to stdout (for monitoring / panel consumption)
-        sys.stdout.write(raw)
-        sys.stdout.flush()
+        # Emit raw VLM output to stdout (for monitoring / panel consumption),
+        # as UTF-8 straight to the byte buffer: one encode, no trip through
+        # the text layer, and no console code page that can reject a
+        # character the model produced.
+        out = sys.stdout.buffer
+        out.write(raw.encode("utf-8", "surrogatepass"))
+        out.flush()
+
+        # One timestamp per turn, shared by the dump and state.json
+        timestamp = datetime.now().isoformat()
 
         # Optional debug artifacts
         if dump_dir is not None:
-            _dump(dump_dir, state.turn, prev_story, raw, executor_result)
+            _dump(dump_dir, state.turn, prev_story, raw, executor_result, timestamp)
 
         # Store the raw VLM output AS-IS for next turn (SST)
         state.story = raw
-        _save_state(state, prev_story, raw, executor_result)
+        _save_state(state, prev_story, executor_result, timestamp)
 
         time.sleep(LOOP_DELAY)
 
@@ -27,7 +27,7 @@ WHAT THIS FILE DOES:
     7. Performs SST VERIFICATION: compares the current request's messages[1]
        text to the previous response's content. Logs a WARNING if they differ.
     8. Pushes the parsed turn data to all connected SSE clients for live display.
-    9. Writes per-turn JSON logs to panel_log/ directory.
+    9. Appends one JSON line per turn to panel_log/turns.jsonl.
    10. Extracts the FULL base64 image data URI from the request payload and
        includes it in the SSE broadcast, enabling the dashboard to render a
        live screenshot of every frame the pipeline sends to the VLM.
@@ -68,22 +68,27 @@ PORTS:
 
 RUNTIME:
     - Windows 11, Python 3.13+
-    - Stdlib only (http.server, urllib, json, threading)
+    - Stdlib only (http.server, http.client, json, threading)
 """
 
 
+import http.client
 import http.server
 import json
+import os
 import queue
+import select
+import selectors
+import socket
 import sys
 import threading
 import time
 import traceback
-import urllib.error
-import urllib.request
+import urllib.parse
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import Final
+from typing import BinaryIO, Final
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -93,6 +98,17 @@ PROXY_HOST: Final[str] = "127.0.0.1"
 PROXY_PORT: Final[int] = 1234
 
 UPSTREAM_URL: Final[str] = "http://127.0.0.1:1235/v1/chat/completions"
+_UPSTREAM: Final[urllib.parse.SplitResult] = urllib.parse.urlsplit(UPSTREAM_URL)
+
+# The request body is relayed upstream in pieces of this size as it arrives.
+FORWARD_CHUNK: Final[int] = 64 * 1024
+# Larger bodies are relayed through one FORWARD_CHUNK buffer and not
+# inspected, so a runaway request cannot balloon the panel's memory.
+# A 4K screenshot is around 8 MiB of base64, well under this.
+MAX_INSPECT_BYTES: Final[int] = 64 * 1024 * 1024
+# Idle keep-alive connections to the upstream VLM kept for the next turn.
+UPSTREAM_KEEPALIVE: Final[int] = 4
+UPSTREAM_TIMEOUT: Final[float] = 120.0
 
 DASHBOARD_HOST: Final[str] = "127.0.0.1"
 DASHBOARD_PORT: Final[int] = 8080
@@ -102,6 +118,27 @@ HTML_FILE: Final[Path] = Path(__file__).parent / "panel.html"
 
 MAX_SSE_CLIENTS: Final[int] = 20
 SSE_KEEPALIVE_SEC: Final[float] = 15.0
+# Frames a dashboard client may fall behind by before it is dropped.
+SSE_MAX_PENDING: Final[int] = 200
+
+# Handler threads per server. SSE streams are handed off to one dispatcher
+# thread, so dashboard workers are only busy for the length of a request.
+PROXY_WORKERS: Final[int] = 8
+DASHBOARD_WORKERS: Final[int] = 4
+# Socket timeouts on client connections, so one that goes quiet (a browser
+# preconnect, a half-open socket) cannot hold a worker forever. The proxy
+# one bounds each read of main.py's request, not the wait on the VLM.
+PROXY_CLIENT_TIMEOUT: Final[float] = 30.0
+DASHBOARD_CLIENT_TIMEOUT: Final[float] = 5.0
+
+# Every turn is appended as one line of the compact JSON sent to the
+# dashboard to LOG_DIR / LOG_FILE_NAME, fsynced every LOG_FSYNC_EVERY turns.
+LOG_FILE_NAME: Final[str] = "turns.jsonl"
+LOG_FSYNC_EVERY: Final[int] = 10
+# Also write turn_NNNN.json per turn; LOG_PRETTY indents those for reading
+# by hand (costs a second encode).
+LOG_PER_TURN_FILES: Final[bool] = False
+LOG_PRETTY: Final[bool] = False
 
 # ---------------------------------------------------------------------------
 # Shared state (thread-safe)
@@ -113,10 +150,19 @@ _turn_lock = threading.Lock()
 _last_vlm_response_text: str | None = None
 _last_vlm_lock = threading.Lock()
 
-# SSE client queues
-_sse_clients: list[queue.Queue[str]] = []
+# Streams every SSE client; started by the first dashboard connection
+_sse_dispatcher: "_SSEDispatcher | None" = None
 _sse_lock = threading.Lock()
 
+# Idle keep-alive connections to the upstream VLM
+_upstream_idle: list[http.client.HTTPConnection] = []
+_upstream_lock = threading.Lock()
+
+# Finished turns waiting to be logged and broadcast (None stops the worker)
+_post_turn_queue: queue.SimpleQueue[dict | None] = queue.SimpleQueue()
+_post_turn_worker: threading.Thread | None = None
+_post_turn_lock = threading.Lock()
+
 
 def _next_turn() -> int:
     global _turn_counter
@@ -136,39 +182,233 @@ def _get_last_vlm_response() -> str | None:
         return _last_vlm_response_text
 
 
-def _broadcast_sse(data: str) -> None:
-    """Send an SSE message to all connected dashboard clients."""
-    msg = f"data: {data}\n\n"
-    dead: list[queue.Queue[str]] = []
-    with _sse_lock:
-        for q in _sse_clients:
-            try:
-                q.put_nowait(msg)
-            except queue.Full:
-                dead.append(q)
-        for q in dead:
-            try:
-                _sse_clients.remove(q)
-            except ValueError:
-                pass
+def _broadcast_sse(frame: bytes) -> None:
+    """Send an encoded SSE frame to all connected dashboard clients.
+
+    Every client gets the same bytes object; nothing is copied or encoded
+    per client. With no dashboard open (the usual case) it returns without
+    waking the dispatcher.
+    """
+    dispatcher = _sse_dispatcher
+    if dispatcher is not None and dispatcher.has_clients():
+        dispatcher.post(frame)
 
 
-def _register_sse_client() -> queue.Queue[str]:
-    q: queue.Queue[str] = queue.Queue(maxsize=200)
+def _start_sse_dispatcher() -> "_SSEDispatcher":
+    global _sse_dispatcher
     with _sse_lock:
-        # Evict oldest if at capacity
-        while len(_sse_clients) >= MAX_SSE_CLIENTS:
-            _sse_clients.pop(0)
-        _sse_clients.append(q)
-    return q
+        if _sse_dispatcher is None:
+            _sse_dispatcher = _SSEDispatcher()
+        return _sse_dispatcher
 
 
-def _unregister_sse_client(q: queue.Queue[str]) -> None:
-    with _sse_lock:
+# ---------------------------------------------------------------------------
+# SSE dispatcher
+# ---------------------------------------------------------------------------
+
+_SSE_KEEPALIVE: Final[bytes] = b": keepalive\n\n"
+
+
+class _SSEClient:
+    __slots__ = ("sock", "pending", "offset", "last_write")
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.pending: deque[bytes] = deque()
+        self.offset = 0  # bytes of pending[0] already sent
+        self.last_write = time.monotonic()
+
+
+class _SSEDispatcher:
+    """One thread that streams frames to every SSE client.
+
+    Client sockets are non-blocking and watched by a selector: always for
+    reads (a disconnect shows up as EOF), and for writes only while frames
+    are pending. Other threads talk to it through an inbox plus a wake-up
+    socket, so nothing here needs a lock: the inbox is a deque, whose
+    append and popleft are atomic, and the dispatcher never blocks on it.
+    """
+
+    def __init__(self) -> None:
+        self._sel = selectors.DefaultSelector()
+        self._inbox: deque[socket.socket | bytes] = deque()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._sel.register(self._wake_r, selectors.EVENT_READ)
+        # Insertion-ordered, so the first entry is the oldest client
+        self._clients: dict[socket.socket, _SSEClient] = {}
+        threading.Thread(target=self._run, name="sse-dispatcher", daemon=True).start()
+
+    def post(self, item: socket.socket | bytes) -> None:
+        """Hand over a new client socket or a frame to broadcast."""
+        self._inbox.append(item)
         try:
-            _sse_clients.remove(q)
-        except ValueError:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass  # wake-up already pending
+
+    def has_clients(self) -> bool:
+        """Whether any client is connected or queued to be added.
+
+        Read without locking: a client racing in with this call is treated
+        as having connected just after it.
+        """
+        return bool(self._clients) or bool(self._inbox)
+
+    def _run(self) -> None:
+        while True:
+            # Keepalive deadline over idle clients only; a client with
+            # frames pending is woken by EVENT_WRITE once it can take them.
+            timeout = None
+            idle = [c.last_write for c in self._clients.values() if not c.pending]
+            if idle:
+                timeout = max(0.0, min(idle) + SSE_KEEPALIVE_SEC - time.monotonic())
+            for key, events in self._sel.select(timeout):
+                if key.fileobj is self._wake_r:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except OSError:
+                        pass
+                    continue
+                client: _SSEClient = key.data
+                if events & selectors.EVENT_READ and not self._readable(client):
+                    continue
+                if events & selectors.EVENT_WRITE:
+                    self._flush(client)
+
+            inbox = self._inbox
+            while inbox:
+                item = inbox.popleft()
+                if isinstance(item, socket.socket):
+                    self._add(item)
+                else:
+                    self._broadcast(item)
+
+            now = time.monotonic()
+            for client in list(self._clients.values()):
+                if not client.pending and now - client.last_write >= SSE_KEEPALIVE_SEC:
+                    client.pending.append(_SSE_KEEPALIVE)
+                    self._flush(client)
+
+    def _add(self, sock: socket.socket) -> None:
+        # Evict oldest if at capacity
+        while len(self._clients) >= MAX_SSE_CLIENTS:
+            self._drop(next(iter(self._clients.values())))
+        sock.setblocking(False)
+        client = _SSEClient(sock)
+        self._clients[sock] = client
+        self._sel.register(sock, selectors.EVENT_READ, client)
+
+    def _broadcast(self, frame: bytes) -> None:
+        for client in list(self._clients.values()):
+            if len(client.pending) >= SSE_MAX_PENDING:
+                self._drop(client)
+                continue
+            client.pending.append(frame)
+            self._flush(client)
+
+    def _readable(self, client: _SSEClient) -> bool:
+        """Consume client input; False (and dropped) once it has hung up."""
+        try:
+            if client.sock.recv(4096):
+                return True
+        except BlockingIOError:
+            return True
+        except OSError:
             pass
+        self._drop(client)
+        return False
+
+    def _flush(self, client: _SSEClient) -> None:
+        """Write as much pending data as the socket takes without blocking."""
+        sent = False
+        try:
+            while client.pending:
+                frame = client.pending[0]
+                with memoryview(frame) as mv:
+                    n = client.sock.send(mv[client.offset :])
+                sent = True
+                client.offset += n
+                if client.offset < len(frame):
+                    break
+                client.pending.popleft()
+                client.offset = 0
+        except BlockingIOError:
+            pass
+        except OSError:
+            self._drop(client)
+            return
+        if sent:
+            client.last_write = time.monotonic()
+        events = selectors.EVENT_READ
+        if client.pending:
+            events |= selectors.EVENT_WRITE
+        self._sel.modify(client.sock, events, client)
+
+    def _drop(self, client: _SSEClient) -> None:
+        if self._clients.pop(client.sock, None) is None:
+            return
+        self._sel.unregister(client.sock)
+        try:
+            client.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        client.sock.close()
+
+
+# ---------------------------------------------------------------------------
+# Upstream connections
+# ---------------------------------------------------------------------------
+
+def _new_upstream() -> http.client.HTTPConnection:
+    return http.client.HTTPConnection(
+        _UPSTREAM.hostname, _UPSTREAM.port, timeout=UPSTREAM_TIMEOUT
+    )
+
+
+def _connection_dropped(conn: http.client.HTTPConnection) -> bool:
+    """True if an idle connection was closed (or spoken on) by the VLM."""
+    if conn.sock is None:
+        return True
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+def _acquire_upstream() -> tuple[http.client.HTTPConnection, bool]:
+    """Take an idle keep-alive connection, or open a new one.
+
+    Returns the connection and whether it was reused.
+    """
+    while True:
+        with _upstream_lock:
+            conn = _upstream_idle.pop() if _upstream_idle else None
+        if conn is None:
+            return _new_upstream(), False
+        if not _connection_dropped(conn):
+            return conn, True
+        conn.close()
+
+
+def _release_upstream(conn: http.client.HTTPConnection, reusable: bool) -> None:
+    """Park a connection whose response was fully read, else close it."""
+    if reusable and conn.sock is not None:
+        with _upstream_lock:
+            if len(_upstream_idle) < UPSTREAM_KEEPALIVE:
+                _upstream_idle.append(conn)
+                return
+    conn.close()
+
+
+def _send_upstream_head(conn: http.client.HTTPConnection, content_length: int) -> None:
+    conn.putrequest("POST", _UPSTREAM.path, skip_accept_encoding=True)
+    conn.putheader("Content-Type", "application/json")
+    conn.putheader("Content-Length", str(content_length))
+    conn.endheaders()
 
 
 # ---------------------------------------------------------------------------
@@ -179,79 +419,179 @@ def _ensure_log_dir() -> None:
     LOG_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def _log_turn(turn: int, entry: dict) -> None:
+# Owned by the post-turn worker, the only caller of _log_turn
+_log_file: BinaryIO | None = None
+_log_unsynced: int = 0
+
+
+def _log_turn(turn: int, entry: dict, line: memoryview | bytes) -> None:
+    """Append a turn's entry, given already encoded as one JSON line."""
+    global _log_file, _log_unsynced
+    if LOG_PER_TURN_FILES:
+        try:
+            path = LOG_DIR / f"turn_{turn:04d}.json"
+            if LOG_PRETTY:
+                uri = entry["request"]["image_data_uri"]
+                if not isinstance(uri, str):
+                    entry = _with_image_uri(entry, uri.decode("ascii"))
+                path.write_bytes(json.dumps(entry, indent=2, default=str).encode("utf-8"))
+            else:
+                path.write_bytes(line[:-1])
+        except Exception:
+            pass
+    if not line:
+        return
     try:
-        path = LOG_DIR / f"turn_{turn:04d}.json"
-        path.write_text(json.dumps(entry, indent=2, default=str), encoding="utf-8")
+        if _log_file is None:
+            _log_file = open(LOG_DIR / LOG_FILE_NAME, "ab")
+        _log_file.write(line)
+        _log_file.flush()
+        _log_unsynced += 1
+        if _log_unsynced >= LOG_FSYNC_EVERY:
+            os.fsync(_log_file.fileno())
+            _log_unsynced = 0
     except Exception:
         pass
 
 
+def _close_log() -> None:
+    global _log_file
+    if _log_file is not None:
+        try:
+            _log_file.flush()
+            os.fsync(_log_file.fileno())
+            _log_file.close()
+        except Exception:
+            pass
+        _log_file = None
+
+
 # ---------------------------------------------------------------------------
 # Request/Response parsing (READ-ONLY, on copies)
 # ---------------------------------------------------------------------------
 
-def _safe_parse_request(raw_body: bytes) -> dict:
-    """Parse the request body for display. Returns a summary dict."""
-    result: dict = {
+# Stands in for the screenshot's data URI while the rest of the request is
+# parsed. Raw JSON cannot carry a NUL, so only the escape below produces it.
+_IMAGE_PLACEHOLDER: Final[str] = "\x00image"
+_IMAGE_PLACEHOLDER_JSON: Final[bytes] = b'"\\u0000image"'
+
+
+def _cut_data_uri(raw_body: bytes | bytearray) -> tuple[bytes, bytes] | None:
+    """Take the first data URI string out of the body before parsing.
+
+    The base64 image is nearly all of the request, and json.loads would
+    scan it character by character for escapes. Returns a copy of the body
+    with that string swapped for a placeholder, plus the URI itself as
+    ASCII bytes; None when there is none, or it is not a plain ASCII
+    escape-free string.
+    """
+    start = raw_body.find(b'"data:')
+    if start < 0:
+        return None
+    end = raw_body.find(b'"', start + 1)
+    if (
+        end < 0
+        or raw_body.find(b"\\", start, end) >= 0
+        or raw_body.find(b"\\u0000", 0, start) >= 0
+        or raw_body.find(b"\\u0000", end) >= 0
+    ):
+        return None
+    with memoryview(raw_body) as mv:
+        uri = bytes(mv[start + 1 : end])
+    if not uri.isascii():
+        return None
+    return raw_body[:start] + _IMAGE_PLACEHOLDER_JSON + raw_body[end + 1 :], uri
+
+
+def _empty_request_summary() -> dict:
+    return {
         "model": "",
         "sst_text": "",
         "feedback_text": "",
         "has_image": False,
-        "image_b64_prefix": "",
+        # str from a full parse, or the raw bytes cut out by _cut_data_uri
         "image_data_uri": "",
         "sampling": {},
         "messages_count": 0,
         "parse_error": None,
     }
-    try:
-        obj = json.loads(raw_body)
-        result["model"] = str(obj.get("model", ""))
-        messages = obj.get("messages", [])
-        result["messages_count"] = len(messages)
-
-        # Sampling params
-        for key in ("temperature", "top_p", "max_tokens"):
-            if key in obj:
-                result["sampling"][key] = obj[key]
-
-        # messages[1] = SST (user message #1)
-        if len(messages) > 1:
-            msg1 = messages[1]
-            content = msg1.get("content", "")
-            if isinstance(content, list):
-                for part in content:
-                    if isinstance(part, dict) and part.get("type") == "text":
-                        result["sst_text"] = str(part.get("text", ""))
-                        break
-            elif isinstance(content, str):
-                result["sst_text"] = content
-
-        # messages[2] = feedback + image (user message #2)
-        if len(messages) > 2:
-            msg2 = messages[2]
-            content = msg2.get("content", "")
-            if isinstance(content, list):
-                for part in content:
-                    if isinstance(part, dict):
-                        if part.get("type") == "text":
-                            result["feedback_text"] = str(part.get("text", ""))
-                        elif part.get("type") == "image_url":
-                            result["has_image"] = True
-                            url = str(part.get("image_url", {}).get("url", ""))
-                            # Store first 80 chars for log display
-                            result["image_b64_prefix"] = url[:80] + "..."
-                            # Store the FULL data-URI so the dashboard can display it
-                            result["image_data_uri"] = url
-            elif isinstance(content, str):
-                result["feedback_text"] = content
 
+
+def _safe_parse_request(raw_body: bytes | bytearray) -> dict:
+    """Parse the request body for display. Returns a summary dict.
+
+    The data URI is cut out first and the rest parsed on its own. That is
+    only trusted if the placeholder comes back as an image URL; anything
+    else (say, a text that merely contains '"data:') means a full parse.
+    """
+    result = _empty_request_summary()
+    try:
+        cut = _cut_data_uri(raw_body)
+        if cut is not None:
+            try:
+                if _summarize_request(json.loads(cut[0]), result, cut[1]):
+                    return result
+            except Exception:
+                pass
+            result = _empty_request_summary()
+        _summarize_request(json.loads(raw_body), result, None)
     except Exception as e:
         result["parse_error"] = str(e)
 
     return result
 
 
+def _summarize_request(obj: dict, result: dict, image_uri: bytes | None) -> bool:
+    """Fill 'result' from a parsed request.
+
+    With 'image_uri', the placeholder it was cut from is put back; returns
+    False if the placeholder was not found in an image URL.
+    """
+    placed = image_uri is None
+    result["model"] = str(obj.get("model", ""))
+    messages = obj.get("messages", [])
+    result["messages_count"] = len(messages)
+
+    # Sampling params
+    for key in ("temperature", "top_p", "max_tokens"):
+        if key in obj:
+            result["sampling"][key] = obj[key]
+
+    # messages[1] = SST (user message #1)
+    if len(messages) > 1:
+        msg1 = messages[1]
+        content = msg1.get("content", "")
+        if isinstance(content, list):
+            for part in content:
+                if isinstance(part, dict) and part.get("type") == "text":
+                    result["sst_text"] = str(part.get("text", ""))
+                    break
+        elif isinstance(content, str):
+            result["sst_text"] = content
+
+    # messages[2] = feedback + image (user message #2)
+    if len(messages) > 2:
+        msg2 = messages[2]
+        content = msg2.get("content", "")
+        if isinstance(content, list):
+            for part in content:
+                if isinstance(part, dict):
+                    if part.get("type") == "text":
+                        result["feedback_text"] = str(part.get("text", ""))
+                    elif part.get("type") == "image_url":
+                        result["has_image"] = True
+                        url: str | bytes = str(part.get("image_url", {}).get("url", ""))
+                        if url == _IMAGE_PLACEHOLDER and image_uri is not None:
+                            url = image_uri
+                            placed = True
+                        # Store the FULL data-URI so the dashboard can display it
+                        result["image_data_uri"] = url
+        elif isinstance(content, str):
+            result["feedback_text"] = content
+
+    return placed
+
+
 def _safe_parse_response(raw_body: bytes) -> dict:
     """Parse the VLM response for display. Returns a summary dict."""
     result: dict = {
@@ -281,6 +621,22 @@ def _safe_parse_response(raw_body: bytes) -> dict:
 # SST Verification
 # ---------------------------------------------------------------------------
 
+def _common_prefix_len(a: str, b: str) -> int:
+    """Length of the common prefix of a and b.
+
+    Bisects on slice equality, so each probe is a C-level compare instead
+    of a per-character loop in Python.
+    """
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
 def _verify_sst(turn: int, sst_text: str) -> dict:
     """Compare the SST text in this request to the VLM output from last turn."""
     prev = _get_last_vlm_response()
@@ -309,13 +665,8 @@ def _verify_sst(turn: int, sst_text: str) -> dict:
         result["detail"] = f"SST matches previous VLM response ({len(sst_text)} chars)"
     else:
         result["match"] = False
-        # Find where they diverge
-        min_len = min(len(sst_text), len(prev))
-        diff_pos = min_len  # assume they differ at the end if one is longer
-        for i in range(min_len):
-            if sst_text[i] != prev[i]:
-                diff_pos = i
-                break
+        # Find where they diverge (the end of the shorter one if it is a prefix)
+        diff_pos = _common_prefix_len(sst_text, prev)
         result["detail"] = (
             f"SST VIOLATION! Texts differ at position {diff_pos}. "
             f"SST length={len(sst_text)}, prev response length={len(prev)}. "
@@ -326,6 +677,128 @@ def _verify_sst(turn: int, sst_text: str) -> dict:
     return result
 
 
+# ---------------------------------------------------------------------------
+# Turn entry encoding
+# ---------------------------------------------------------------------------
+
+# Characters a JSON string cannot hold unescaped.
+_JSON_UNSAFE: Final[bytes] = bytes(range(0x20)) + b'"\\'
+_COMPACT: Final[tuple[str, str]] = (",", ":")
+_SSE_PREFIX: Final[bytes] = b"data: "
+_SSE_SUFFIX: Final[bytes] = b"\n\n"
+
+
+def _with_image_uri(entry: dict, uri: str) -> dict:
+    return {**entry, "request": {**entry["request"], "image_data_uri": uri}}
+
+
+def _encode_entry(entry: dict) -> bytes:
+    """Encode a turn entry as one SSE frame: "data: " + compact JSON + "\\n\\n".
+
+    The frame is built in a single join. The log line is a slice of the
+    same buffer, so neither needs a copy of its own.
+
+    The screenshot data URI is almost the whole entry and, being base64,
+    has nothing to escape: when it checks out as such it is spliced in as
+    bytes instead of being rescanned by json.dumps. The parser usually
+    hands it over as ASCII bytes already.
+    """
+    uri = entry["request"]["image_data_uri"]
+    if isinstance(uri, str):
+        raw_uri = uri.encode("ascii") if uri.isascii() else b""
+    else:
+        raw_uri = uri
+    if raw_uri and len(raw_uri.translate(None, _JSON_UNSAFE)) == len(raw_uri):
+        text = json.dumps(
+            _with_image_uri(entry, _IMAGE_PLACEHOLDER), default=str, separators=_COMPACT
+        )
+        parts = text.split(json.dumps(_IMAGE_PLACEHOLDER)[1:-1])
+        if len(parts) == 2:
+            return b"".join(
+                (
+                    _SSE_PREFIX,
+                    parts[0].encode("ascii"),
+                    raw_uri,
+                    parts[1].encode("ascii"),
+                    _SSE_SUFFIX,
+                )
+            )
+    if not isinstance(uri, str):
+        entry = _with_image_uri(entry, uri.decode("ascii"))
+    text = json.dumps(entry, default=str, separators=_COMPACT)
+    return b"".join((_SSE_PREFIX, text.encode("utf-8"), _SSE_SUFFIX))
+
+
+# ---------------------------------------------------------------------------
+# Post-turn worker
+# ---------------------------------------------------------------------------
+
+def _post_turn(entry: dict) -> None:
+    """Log a finished turn to disk and console, then push it to the dashboard."""
+    turn = entry["turn"]
+    response = entry["response"]
+
+    # --- Encode once: the log file and the SSE frame share the bytes ---
+    try:
+        frame = _encode_entry(entry)
+    except Exception:
+        frame = b""
+
+    # --- Log to disk: the JSON plus one newline, sliced out of the frame ---
+    with memoryview(frame) as mv:
+        _log_turn(turn, entry, mv[len(_SSE_PREFIX) : -1])
+
+    # --- Console summary ---
+    sst_check = entry["sst_check"]
+    if not sst_check.get("verified", False):
+        sst_indicator = "?"
+    elif sst_check.get("match", False):
+        sst_indicator = "✓"
+    else:
+        sst_indicator = "✗ VIOLATION"
+    sys.stdout.write(
+        f"[panel] turn={turn} "
+        f"latency={entry['latency_ms']:.0f}ms "
+        f"status={response['status']} "
+        f"sst={sst_indicator} "
+        f"vlm_len={response['vlm_text_length']} "
+        f"finish={response['finish_reason']}\n"
+    )
+    sys.stdout.flush()
+
+    # --- Broadcast to SSE dashboard clients ---
+    if frame:
+        _broadcast_sse(frame)
+
+
+def _post_turn_loop() -> None:
+    while (entry := _post_turn_queue.get()) is not None:
+        try:
+            _post_turn(entry)
+        except Exception:
+            traceback.print_exc()
+
+
+def _submit_post_turn(entry: dict) -> None:
+    """Hand a finished turn to the worker, starting it on first use."""
+    global _post_turn_worker
+    if _post_turn_worker is None:
+        with _post_turn_lock:
+            if _post_turn_worker is None:
+                _post_turn_worker = threading.Thread(target=_post_turn_loop, daemon=True)
+                _post_turn_worker.start()
+    _post_turn_queue.put(entry)
+
+
+def _drain_post_turn() -> None:
+    """Let the worker finish queued turns, then stop it and sync the log."""
+    if _post_turn_worker is not None:
+        _post_turn_queue.put(None)
+        _post_turn_worker.join(timeout=10.0)
+        if not _post_turn_worker.is_alive():
+            _close_log()
+
+
 # ---------------------------------------------------------------------------
 # Proxy HTTP Handler (port 1234)
 # ---------------------------------------------------------------------------
@@ -334,6 +807,7 @@ class ProxyHandler(http.server.BaseHTTPRequestHandler):
     """Transparent reverse proxy that forwards requests to the upstream VLM."""
 
     server_version = "FranzPanel/1.0"
+    timeout = PROXY_CLIENT_TIMEOUT
 
     def log_message(self, format: str, *args: object) -> None:
         # Suppress default access logs (we do our own logging)
@@ -344,45 +818,111 @@ class ProxyHandler(http.server.BaseHTTPRequestHandler):
         ts_start = time.monotonic()
         timestamp = datetime.now().isoformat()
 
-        # --- Read the FULL request body from main.py ---
         content_length = int(self.headers.get("Content-Length", 0))
-        raw_request = self.rfile.read(content_length) if content_length > 0 else b""
+        inspect = content_length <= MAX_INSPECT_BYTES
+        conn, reused = _acquire_upstream()
+        if reused and not inspect:
+            # No copy will be kept to resend, so take no chance on a stale one
+            _release_upstream(conn, True)
+            conn, reused = _new_upstream(), False
+        send_error: Exception | None = None
+        try:
+            _send_upstream_head(conn, content_length)
+        except Exception as e:
+            send_error = e.with_traceback(None)
+
+        # --- Read the FULL request body from main.py, relaying each piece
+        # upstream as it arrives. The ORIGINAL bytes are forwarded as-is,
+        # straight from the one buffer they are read into; the upload to
+        # the VLM overlaps the upload from main.py. A body too large to
+        # inspect cycles through a single chunk-sized buffer instead. ---
+        raw_request = bytearray(content_length if inspect else FORWARD_CHUNK)
+        view = memoryview(raw_request)
+        received = 0
+        while received < content_length:
+            at = received if inspect else 0
+            try:
+                n = self.rfile.readinto(
+                    view[at : at + min(FORWARD_CHUNK, content_length - received)]
+                )
+            except OSError:
+                # Stalled past PROXY_CLIENT_TIMEOUT or reset: an incomplete body
+                break
+            if not n:
+                break
+            if send_error is None:
+                try:
+                    conn.send(view[at : at + n])
+                except Exception as e:
+                    # Drop the traceback: its frames hold a slice of view
+                    send_error = e.with_traceback(None)
+            received += n
+        view.release()
+
+        complete = received == content_length
+        if not complete:
+            # main.py hung up mid-upload. The VLM was promised the full
+            # Content-Length and would wait for the rest, so abandon it.
+            conn.close()
+            send_error = ConnectionError(
+                f"request body ended after {received} of {content_length} bytes"
+            )
+        elif send_error is not None and reused:
+            # A kept-alive connection the VLM dropped while idle fails on
+            # the first write. The whole body is in hand now: resend it on
+            # a fresh connection.
+            conn.close()
+            conn = _new_upstream()
+            send_error = None
+            try:
+                _send_upstream_head(conn, len(raw_request))
+                conn.send(raw_request)
+            except Exception as e:
+                send_error = e.with_traceback(None)
 
         # --- Parse a COPY for inspection (never touch raw_request) ---
-        req_parsed = _safe_parse_request(raw_request)
+        # This now runs while the VLM is already working on the request.
+        if inspect and complete:
+            req_parsed = _safe_parse_request(raw_request)
+            sst_check = _verify_sst(turn, req_parsed["sst_text"])
+        else:
+            if complete:
+                reason = f"body too large to inspect ({received} bytes)"
+            else:
+                reason = f"body incomplete ({received} of {content_length} bytes)"
+            req_parsed = _empty_request_summary()
+            req_parsed["parse_error"] = reason
+            sst_check = {
+                "verified": False,
+                "match": False,
+                "prev_available": _get_last_vlm_response() is not None,
+                "detail": f"Request not inspected: {reason}",
+            }
+        if not (inspect and complete):
+            raw_request = bytearray()
 
         # --- SST verification ---
-        sst_check = _verify_sst(turn, req_parsed["sst_text"])
         if sst_check["verified"] and not sst_check["match"]:
             sys.stderr.write(f"[panel] ⚠ SST VIOLATION on turn {turn}: {sst_check['detail']}\n")
             sys.stderr.flush()
 
-        # --- Forward ORIGINAL raw bytes to upstream VLM ---
-        upstream_req = urllib.request.Request(
-            UPSTREAM_URL,
-            data=raw_request,  # ORIGINAL BYTES, not re-serialized
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
-
         raw_response = b""
         resp_status = 500
-        resp_headers: dict[str, str] = {}
         resp_parsed: dict = {}
         error_detail = ""
+        reusable = False
 
         try:
-            with urllib.request.urlopen(upstream_req, timeout=120) as resp:
-                resp_status = resp.status
-                resp_headers = dict(resp.headers)
-                raw_response = resp.read()  # ORIGINAL BYTES from VLM
-
-        except urllib.error.HTTPError as e:
-            resp_status = e.code
-            raw_response = e.read() if e.fp else b""
-            error_detail = f"HTTPError {e.code}: {e.reason}"
-            sys.stderr.write(f"[panel] upstream error on turn {turn}: {error_detail}\n")
-            sys.stderr.flush()
+            if send_error is not None:
+                raise send_error
+            resp = conn.getresponse()
+            resp_status = resp.status
+            raw_response = resp.read()  # ORIGINAL BYTES from VLM
+            reusable = not resp.will_close
+            if resp_status >= 400:
+                error_detail = f"HTTPError {resp_status}: {resp.reason}"
+                sys.stderr.write(f"[panel] upstream error on turn {turn}: {error_detail}\n")
+                sys.stderr.flush()
 
         except Exception as e:
             error_detail = f"{type(e).__name__}: {e}"
@@ -390,6 +930,9 @@ class ProxyHandler(http.server.BaseHTTPRequestHandler):
             sys.stderr.write(f"[panel] upstream exception on turn {turn}: {error_detail}\n")
             sys.stderr.flush()
 
+        finally:
+            _release_upstream(conn, reusable)
+
         ts_end = time.monotonic()
         latency_ms = (ts_end - ts_start) * 1000.0
 
@@ -400,12 +943,20 @@ class ProxyHandler(http.server.BaseHTTPRequestHandler):
         if resp_parsed["vlm_text"]:
             _set_last_vlm_response(resp_parsed["vlm_text"])
 
+        request_size = received
+        response_size = len(raw_response)
+
         # --- Forward ORIGINAL raw bytes back to main.py ---
-        self.send_response(resp_status)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(raw_response)))
-        self.end_headers()
-        self.wfile.write(raw_response)  # ORIGINAL BYTES, not re-serialized
+        # (it may be gone already, e.g. after an incomplete upload; the
+        # turn is still logged)
+        try:
+            self.send_response(resp_status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(response_size))
+            self.end_headers()
+            self.wfile.write(raw_response)  # ORIGINAL BYTES, not re-serialized
+        except OSError:
+            self.close_connection = True
 
         # --- Build log/SSE entry ---
         entry = {
@@ -421,7 +972,7 @@ class ProxyHandler(http.server.BaseHTTPRequestHandler):
                 "image_data_uri": req_parsed["image_data_uri"],
                 "sampling": req_parsed["sampling"],
                 "messages_count": req_parsed["messages_count"],
-                "body_size_bytes": len(raw_request),
+                "body_size_bytes": request_size,
                 "parse_error": req_parsed["parse_error"],
             },
             "response": {
@@ -430,33 +981,15 @@ class ProxyHandler(http.server.BaseHTTPRequestHandler):
                 "vlm_text_length": len(resp_parsed["vlm_text"]),
                 "finish_reason": resp_parsed["finish_reason"],
                 "usage": resp_parsed["usage"],
-                "body_size_bytes": len(raw_response),
+                "body_size_bytes": response_size,
                 "parse_error": resp_parsed["parse_error"],
                 "error": error_detail,
             },
             "sst_check": sst_check,
         }
 
-        # --- Log to disk ---
-        _log_turn(turn, entry)
-
-        # --- Console summary ---
-        sst_indicator = "✓" if sst_check.get("match", False) else "✗ VIOLATION"
-        sys.stdout.write(
-            f"[panel] turn={turn} "
-            f"latency={latency_ms:.0f}ms "
-            f"status={resp_status} "
-            f"sst={sst_indicator} "
-            f"vlm_len={len(resp_parsed['vlm_text'])} "
-            f"finish={resp_parsed['finish_reason']}\n"
-        )
-        sys.stdout.flush()
-
-        # --- Broadcast to SSE dashboard clients ---
-        try:
-            _broadcast_sse(json.dumps(entry, default=str))
-        except Exception:
-            pass
+        # --- Log, summarize and broadcast off this thread ---
+        _submit_post_turn(entry)
 
 
 # ---------------------------------------------------------------------------
@@ -467,6 +1000,7 @@ class DashboardHandler(http.server.BaseHTTPRequestHandler):
     """Serves the HTML dashboard and SSE event stream."""
 
     server_version = "FranzDashboard/1.0"
+    timeout = DASHBOARD_CLIENT_TIMEOUT
 
     def log_message(self, format: str, *args: object) -> None:
         pass
@@ -510,25 +1044,20 @@ class DashboardHandler(http.server.BaseHTTPRequestHandler):
         self.send_header("Access-Control-Allow-Origin", "*")
         self.end_headers()
 
-        client_q = _register_sse_client()
+        # The socket now belongs to the stream; never read another request
+        self.close_connection = True
         try:
             # Send initial connection event
             self.wfile.write(b"data: {\"type\":\"connected\"}\n\n")
             self.wfile.flush()
-
-            while True:
-                try:
-                    msg = client_q.get(timeout=SSE_KEEPALIVE_SEC)
-                    self.wfile.write(msg.encode("utf-8"))
-                    self.wfile.flush()
-                except queue.Empty:
-                    # Keepalive comment to prevent timeout
-                    self.wfile.write(b": keepalive\n\n")
-                    self.wfile.flush()
         except (BrokenPipeError, ConnectionResetError, OSError):
-            pass
-        finally:
-            _unregister_sse_client(client_q)
+            return
+
+        # Hand the connection to the dispatcher thread. Detaching leaves
+        # this handler's socket object empty, so the server's shutdown and
+        # close after we return do not touch the live connection.
+        dispatcher = _start_sse_dispatcher()
+        dispatcher.post(socket.socket(fileno=self.connection.detach()))
 
 
 # ---------------------------------------------------------------------------
@@ -536,17 +1065,29 @@ class DashboardHandler(http.server.BaseHTTPRequestHandler):
 # ---------------------------------------------------------------------------
 
 class ThreadedHTTPServer(http.server.HTTPServer):
-    """HTTPServer that handles each request in a new thread."""
-    daemon_threads = True
+    """HTTPServer that handles requests on a fixed pool of worker threads.
+
+    Requests arriving while every worker is busy wait in the job queue.
+    Workers are daemon threads so a stuck SSE stream never blocks exit.
+    """
     allow_reuse_address = True
 
+    def __init__(self, server_address, handler_class, workers: int = PROXY_WORKERS) -> None:
+        super().__init__(server_address, handler_class)
+        self._jobs: queue.SimpleQueue[tuple] = queue.SimpleQueue()
+        for i in range(workers):
+            threading.Thread(
+                target=self._worker_loop,
+                name=f"{handler_class.__name__}-{i}",
+                daemon=True,
+            ).start()
+
+    def _worker_loop(self) -> None:
+        while True:
+            self.process_request_thread(*self._jobs.get())
+
     def process_request(self, request, client_address) -> None:  # type: ignore[override]
-        t = threading.Thread(
-            target=self.process_request_thread,
-            args=(request, client_address),
-            daemon=True,
-        )
-        t.start()
+        self._jobs.put((request, client_address))
 
     def process_request_thread(self, request, client_address) -> None:  # type: ignore[override]
         try:
@@ -565,7 +1106,7 @@ def main() -> None:
     _ensure_log_dir()
 
     # Start proxy server (port 1234)
-    proxy = ThreadedHTTPServer((PROXY_HOST, PROXY_PORT), ProxyHandler)
+    proxy = ThreadedHTTPServer((PROXY_HOST, PROXY_PORT), ProxyHandler, PROXY_WORKERS)
     proxy_thread = threading.Thread(target=proxy.serve_forever, daemon=True)
     proxy_thread.start()
     sys.stdout.write(
@@ -574,7 +1115,9 @@ def main() -> None:
     )
 
     # Start dashboard server (port 8080)
-    dashboard = ThreadedHTTPServer((DASHBOARD_HOST, DASHBOARD_PORT), DashboardHandler)
+    dashboard = ThreadedHTTPServer(
+        (DASHBOARD_HOST, DASHBOARD_PORT), DashboardHandler, DASHBOARD_WORKERS
+    )
     dashboard_thread = threading.Thread(target=dashboard.serve_forever, daemon=True)
     dashboard_thread.start()
     sys.stdout.write(
@@ -593,6 +1136,7 @@ def main() -> None:
         sys.stdout.flush()
         proxy.shutdown()
         dashboard.shutdown()
+        _drain_post_turn()
 
 
 if __name__ == "__main__":